@@ -0,0 +1,159 @@
+"""
+API JSON de matching et d'assignation, à côté de l'interface Streamlit.
+
+    uvicorn api:app --workers 4
+"""
+from typing import List, Dict, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, EmailStr, Field
+from starlette.concurrency import run_in_threadpool
+
+from shoppers_data import SHOPPERS
+from matching import Client, ShopperIndex, match_records, top_matches
+from storage import new_assignment, store_from_env
+from prebrief_queue import queue_from_env
+from prebrief_template import TEMPLATE_STATUS, shed_prebrief, template_prebrief
+from metrics import METRICS
+from semantic import hybrid_from_env
+
+# ============================================================
+# 1. MODÈLES
+# ============================================================
+
+class ClientProfile(BaseModel):
+    """Mêmes champs que le formulaire client de main.py."""
+
+    prenom: str = Field(min_length=1)
+    nom: str = Field(min_length=1)
+    email: Optional[EmailStr] = None
+    gender: str = ""
+    job_sector: str = ""
+    work_env: str = ""
+    style: List[str] = []
+    size: str = ""
+    budget: str = Field(min_length=1)
+    language: str = ""
+    city: str = Field(min_length=1)
+    favorite_brand: str = ""
+    service_type: str = ""
+    objective: str = ""
+    life_event: str = "aucun_particulier"
+    needs_confidence: bool = False
+    mode: Literal["peu_importe", "presentiel", "visio"] = "peu_importe"
+    extra_info: str = ""
+
+    def to_client(self) -> Dict:
+        return self.model_dump(exclude_none=True)
+
+
+class MatchResult(BaseModel):
+    shopper: Dict
+    score: int
+    reasons: List[str]
+
+
+class Assignment(BaseModel):
+    id: str
+    timestamp: str
+    shopper_id: int
+    shopper_nom: str
+    client: Dict
+    prebrief: str = ""
+    prebrief_status: str = "ready"
+
+
+class Prebrief(BaseModel):
+    assignment_id: str
+    prebrief_status: str
+    prebrief: str
+
+
+# ============================================================
+# 2. APPLICATION
+# ============================================================
+
+# Même cœur que main.py : index du catalogue, store et file de pré-briefs
+SHOPPER_INDEX = ShopperIndex(SHOPPERS)
+ASSIGNMENT_STORE = store_from_env()
+PREBRIEF_QUEUE = queue_from_env()
+HYBRID_SCORER = hybrid_from_env(SHOPPER_INDEX)
+
+app = FastAPI(title="Pershop Pilote API")
+
+# Mêmes spans que l'app Streamlit (exposés sur /metrics)
+shortlist_for = METRICS.timed("match")(top_matches)
+save_assignment = METRICS.timed("save_assignment")(ASSIGNMENT_STORE.append)
+
+
+def _shopper_or_404(shopper_id: int) -> Dict:
+    shopper = SHOPPER_INDEX.by_id.get(shopper_id)
+    if shopper is None:
+        raise HTTPException(status_code=404, detail="Personal shopper inconnu")
+    return shopper
+
+
+@app.post("/shoppers/{shopper_id}/match", response_model=MatchResult)
+async def match_shopper(shopper_id: int, profile: ClientProfile):
+    shopper = _shopper_or_404(shopper_id)
+    record = SHOPPER_INDEX.records[SHOPPER_INDEX.position[shopper_id]]
+    score, reasons = match_records(Client.from_dict(profile.to_client()), record)
+    return MatchResult(shopper=shopper, score=score, reasons=reasons)
+
+
+@app.post("/shortlist", response_model=List[MatchResult])
+async def shortlist(profile: ClientProfile, k: int = Query(3, ge=1, le=50)):
+    scored = await run_in_threadpool(
+        shortlist_for, profile.to_client(), SHOPPER_INDEX, k, semantic=HYBRID_SCORER
+    )
+    return [MatchResult(shopper=sh, score=sc, reasons=r) for sh, sc, r in scored]
+
+
+@app.post("/assignments", response_model=Assignment, status_code=201)
+async def create_assignment(profile: ClientProfile):
+    client = profile.to_client()
+    scored = await run_in_threadpool(shortlist_for, client, SHOPPER_INDEX, 1, semantic=HYBRID_SCORER)
+    if not scored:
+        raise HTTPException(status_code=404, detail="Aucun personal shopper adapté")
+
+    best_shopper, _, reasons = scored[0]
+    assignment = new_assignment(client, best_shopper)
+    if await run_in_threadpool(shed_prebrief, PREBRIEF_QUEUE):
+        assignment["prebrief"] = template_prebrief(client, best_shopper, reasons)
+        assignment["prebrief_status"] = TEMPLATE_STATUS
+        await run_in_threadpool(save_assignment, assignment)
+    else:
+        await run_in_threadpool(save_assignment, assignment)
+        await run_in_threadpool(PREBRIEF_QUEUE.enqueue, assignment)
+    return assignment
+
+
+@app.get("/shoppers/{shopper_id}/assignments", response_model=List[Assignment])
+async def list_assignments(
+    shopper_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
+    _shopper_or_404(shopper_id)
+    # Plus récentes en premier
+    return await run_in_threadpool(ASSIGNMENT_STORE.recent_for_shopper, shopper_id, limit, offset)
+
+
+@app.get("/shoppers/{shopper_id}/assignments/{assignment_id}/prebrief", response_model=Prebrief)
+async def get_prebrief(shopper_id: int, assignment_id: str):
+    _shopper_or_404(shopper_id)
+    assignment = await run_in_threadpool(ASSIGNMENT_STORE.get_for_shopper, shopper_id, assignment_id)
+    if assignment is None:
+        raise HTTPException(status_code=404, detail="Assignation introuvable")
+    return Prebrief(
+        assignment_id=assignment_id,
+        prebrief_status=assignment.get("prebrief_status", "ready"),
+        prebrief=assignment.get("prebrief", ""),
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latences et compteurs au format Prometheus."""
+    return METRICS.prometheus()
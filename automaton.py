@@ -0,0 +1,55 @@
+from collections import deque
+from typing import Dict, List, Iterable, Set
+
+# ============================================================
+# AUTOMATE AHO-CORASICK (RECHERCHE MULTI-MOTIFS)
+# ============================================================
+
+class AhoCorasick:
+    """
+    Automate construit une fois sur un vocabulaire de motifs.
+    `find(text)` parcourt le texte une seule fois et renvoie l'ensemble des
+    motifs présents comme sous-chaînes (même sémantique que `motif in text`).
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+
+        for pattern in set(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pattern)
+
+        # Liens d'échec en largeur ; chaque état hérite des sorties de son lien
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[str]:
+        found: Set[str] = set(self._out[0])  # motif vide éventuel
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,273 @@
+"""
+Matching en masse d'un fichier de clients (CSV ou JSONL), en streaming.
+
+    python batch_match.py leads.csv --enqueue-prebriefs
+    python batch_match.py leads.jsonl --batch-size 1000 --workers 8
+    python batch_match.py leads.csv --capacity 20
+
+Chaque client valide est assigné à son meilleur personal shopper ; les
+assignations sont écrites par lots dans le store configuré (ASSIGNMENTS_BACKEND).
+Avec --capacity, chaque lot est affecté globalement (optimizer.py) sans
+dépasser N assignations par shopper, assignations existantes comprises.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from shoppers_data import SHOPPERS
+from matching import ShopperIndex, top_matches
+from storage import AssignmentStore, new_assignment, store_from_env
+from prebrief_queue import PrebriefQueue, queue_from_env
+from optimizer import optimize_assignments
+
+# ============================================================
+# 1. LECTURE DES CLIENTS
+# ============================================================
+
+CLIENT_DEFAULTS: Dict = {
+    "nom": "",
+    "prenom": "",
+    "gender": "",
+    "job_sector": "",
+    "work_env": "",
+    "style": [],
+    "size": "",
+    "budget": "",
+    "language": "",
+    "city": "",
+    "favorite_brand": "",
+    "service_type": "",
+    "objective": "",
+    "life_event": "aucun_particulier",
+    "needs_confidence": False,
+    "mode": "peu_importe",
+    "extra_info": "",
+}
+
+# Mêmes champs obligatoires que le formulaire client
+REQUIRED_FIELDS = ["prenom", "nom", "city", "budget"]
+
+
+def client_from_record(record: Dict) -> Optional[Dict]:
+    """Client au format de page_client, ou None si un champ obligatoire manque."""
+    client = dict(CLIENT_DEFAULTS)
+    for key in CLIENT_DEFAULTS:
+        value = record.get(key)
+        if value is not None and value != "":
+            client[key] = value
+
+    # CSV : styles séparés par "|" ou ",", booléen en texte
+    if isinstance(client["style"], str):
+        client["style"] = [s.strip() for s in client["style"].replace("|", ",").split(",") if s.strip()]
+    if isinstance(client["needs_confidence"], str):
+        client["needs_confidence"] = client["needs_confidence"].strip().lower() in ("1", "true", "oui", "yes")
+    if record.get("email"):
+        client["email"] = record["email"]
+
+    if any(not client[field] for field in REQUIRED_FIELDS):
+        return None
+    return client
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Lit le fichier ligne à ligne (jamais entièrement en mémoire)."""
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield {}
+
+
+def batches(records: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ============================================================
+# 2. MATCHING EN PARALLÈLE
+# ============================================================
+
+_WORKER_INDEX: Optional[ShopperIndex] = None
+
+
+def _init_worker():
+    global _WORKER_INDEX
+    _WORKER_INDEX = ShopperIndex(SHOPPERS)
+
+
+def match_batch(records: List[Dict]) -> Tuple[List[Dict], int]:
+    """(assignations, nb de lignes ignorées) pour un lot ; exécuté dans un processus worker."""
+    assignments = []
+    skipped = 0
+    for record in records:
+        client = client_from_record(record)
+        scored = top_matches(client, _WORKER_INDEX, k=1) if client else []
+        if not scored:
+            skipped += 1
+            continue
+        assignments.append(new_assignment(client, scored[0][0]))
+    return assignments, skipped
+
+
+@dataclass
+class BatchStats:
+    read: int = 0
+    assigned: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.read} clients lus – {self.assigned} assignés – "
+            f"{self.skipped} ignorés – {self.throughput:.0f} clients/s"
+        )
+
+
+def run_batch(
+    path: str,
+    store: AssignmentStore,
+    queue: Optional[PrebriefQueue] = None,
+    batch_size: int = 500,
+    workers: Optional[int] = None,
+    progress: bool = True,
+) -> BatchStats:
+    """
+    Matche tous les clients de `path` et écrit les assignations par lots.
+    Au plus 2 lots par worker sont en vol : la mémoire reste bornée
+    quelle que soit la taille du fichier.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = BatchStats()
+    start = time.perf_counter()
+
+    def consume(future: Future, size: int):
+        assignments, skipped = future.result()
+        if queue is None:
+            for a in assignments:
+                a["prebrief_status"] = "skipped"
+        store.append_many(assignments)
+        if queue is not None:
+            queue.enqueue_many(assignments)
+        stats.read += size
+        stats.assigned += len(assignments)
+        stats.skipped += skipped
+        stats.elapsed = time.perf_counter() - start
+        if progress:
+            print(stats, file=sys.stderr, flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        in_flight: Deque[Tuple[Future, int]] = deque()
+        for batch in batches(read_records(path), batch_size):
+            in_flight.append((pool.submit(match_batch, batch), len(batch)))
+            if len(in_flight) >= 2 * workers:
+                consume(*in_flight.popleft())
+        while in_flight:
+            consume(*in_flight.popleft())
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+# ============================================================
+# 3. AFFECTATION SOUS CAPACITÉ
+# ============================================================
+
+def run_balanced(
+    path: str,
+    store: AssignmentStore,
+    capacity: int,
+    queue: Optional[PrebriefQueue] = None,
+    batch_size: int = 2000,
+    progress: bool = True,
+) -> BatchStats:
+    """
+    Comme run_batch, mais chaque lot est affecté globalement : somme des scores
+    maximale, au plus `capacity` assignations par shopper. La capacité restante
+    est reportée d'un lot à l'autre ; les clients sans place sont ignorés.
+    """
+    index = ShopperIndex(SHOPPERS)
+    remaining: Dict[int, int] = {
+        sid: capacity - store.count_for_shopper(sid) for sid in index.ids
+    }
+    stats = BatchStats()
+    start = time.perf_counter()
+
+    for batch in batches(read_records(path), batch_size):
+        clients = [c for c in map(client_from_record, batch) if c]
+        assignments = []
+        for client, shopper, _ in optimize_assignments(clients, index, remaining):
+            if shopper is None:
+                continue
+            remaining[shopper["id"]] -= 1
+            assignments.append(new_assignment(client, shopper))
+
+        if queue is None:
+            for a in assignments:
+                a["prebrief_status"] = "skipped"
+        store.append_many(assignments)
+        if queue is not None:
+            queue.enqueue_many(assignments)
+        stats.read += len(batch)
+        stats.assigned += len(assignments)
+        stats.skipped += len(batch) - len(assignments)
+        stats.elapsed = time.perf_counter() - start
+        if progress:
+            print(stats, file=sys.stderr, flush=True)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matching en masse de clients (CSV ou JSONL).")
+    parser.add_argument("path", help="fichier .csv ou .jsonl")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : nb de CPU)")
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=None,
+        help="affectation globale, au plus N assignations par shopper",
+    )
+    parser.add_argument(
+        "--enqueue-prebriefs",
+        action="store_true",
+        help="mettre en file la génération des pré-briefs (prebrief_worker.py)",
+    )
+    args = parser.parse_args()
+
+    queue = queue_from_env() if args.enqueue_prebriefs else None
+    if args.capacity is not None:
+        stats = run_balanced(args.path, store_from_env(), args.capacity, queue, args.batch_size)
+    else:
+        stats = run_batch(args.path, store_from_env(), queue, args.batch_size, args.workers)
+    print(f"Terminé en {stats.elapsed:.1f}s : {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Benchmarks des chemins chauds : matching, persistance, construction des prompts.
+
+    python bench.py                                   # tailles 10² à 10⁴
+    python bench.py --max-exp 6 --only match,store    # jusqu'à 10⁶
+    python bench.py --save-baseline                   # fige la référence
+    python bench.py --fail-on-regression              # compare à la référence
+
+Données synthétiques (synthetic_data.py) ayant la forme de shoppers_data.SHOPPERS,
+reproductibles (graine fixe). Tout tourne hors ligne : Groq n'est jamais appelé.
+"""
+import os
+
+# Avant tout import de llm : pas de clé → aucun appel Groq, pas de cache disque
+os.environ["GROQ_API_KEY"] = ""
+os.environ["LLM_CACHE"] = "0"
+
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from itertools import cycle, islice
+from typing import Callable, Dict, List, Optional
+
+from synthetic_data import CLIENT_BUDGETS, synthetic_cities, synthetic_clients, synthetic_shoppers
+from matching import (
+    Client, Shopper, ShopperIndex, compute_budget_level, match, match_records, normalize_city, top_matches,
+)
+from storage import BACKENDS, new_assignment
+from llm import GROQ_ENABLED, prebrief_prompt
+from prebrief_template import template_prebrief
+
+# Au-delà, les objets générés sont réutilisés en boucle (mémoire bornée à 10⁶)
+POOL_MAX = 100_000
+
+# ============================================================
+# 1. MESURE
+# ============================================================
+
+def measure(
+    name: str,
+    size: int,
+    ops: int,
+    fn: Callable[[], None],
+    repeat: int = 3,
+    setup: Optional[Callable[[], None]] = None,
+) -> Dict:
+    """Meilleur temps sur `repeat` passages de `fn`, qui effectue `ops` opérations."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "name": name,
+        "size": size,
+        "ops": ops,
+        "best_s": best,
+        "per_op_us": best / ops * 1e6,
+        "ops_per_s": ops / best if best else 0.0,
+    }
+
+
+def _pool(items: List, n: int) -> List:
+    return list(islice(cycle(items), n))
+
+
+# ============================================================
+# 2. BENCHMARKS
+# ============================================================
+
+def bench_match(sizes: List[int], repeat: int) -> List[Dict]:
+    catalog = synthetic_shoppers(100)
+    clients = synthetic_clients(min(max(sizes), POOL_MAX))
+    results = []
+    for n in sizes:
+        pairs = list(zip(_pool(clients, n), _pool(catalog, n)))
+
+        def run():
+            for client, shopper in pairs:
+                match(client, shopper)
+
+        records = [(Client.from_dict(c), Shopper.from_dict(s)) for c, s in pairs]
+
+        def run_records():
+            for client, shopper in records:
+                match_records(client, shopper)
+
+        results.append(measure("match", n, n, run, repeat))
+        results.append(measure("match_records", n, n, run_records, repeat))
+    return results
+
+
+def bench_normalize_city(sizes: List[int], repeat: int) -> List[Dict]:
+    cities = synthetic_cities(min(max(sizes), POOL_MAX))
+    results = []
+    for n in sizes:
+        batch = _pool(cities, n)
+
+        def run():
+            for city in batch:
+                normalize_city(city)
+
+        # Cache LRU vidé avant chaque passage : on mesure aussi les calculs à froid
+        results.append(measure("normalize_city", n, n, run, repeat, setup=normalize_city.cache_clear))
+    return results
+
+
+def bench_budget_level(sizes: List[int], repeat: int) -> List[Dict]:
+    results = []
+    for n in sizes:
+        budgets = _pool(CLIENT_BUDGETS + ["300-1000€", "luxe", "inconnu"], n)
+
+        def run():
+            for budget in budgets:
+                compute_budget_level(budget)
+
+        results.append(measure("compute_budget_level", n, n, run, repeat))
+    return results
+
+
+def bench_shortlist(sizes: List[int], repeat: int, clients_per_size: int = 200) -> List[Dict]:
+    """Taille = nombre de shoppers du catalogue ; top 3 pour un lot de clients fixe."""
+    clients = synthetic_clients(clients_per_size, seed=1)
+    results = []
+    for n in sizes:
+        catalog = synthetic_shoppers(n, seed=n)
+        holder: Dict = {}
+
+        def build():
+            holder["index"] = ShopperIndex(catalog)
+
+        def run():
+            index = holder["index"]
+            for client in clients:
+                top_matches(client, index, k=3)
+
+        results.append(measure("shortlist_index_build", n, 1, build, repeat))
+        results.append(measure("shortlist", n, len(clients), run, repeat))
+    return results
+
+
+def bench_store(sizes: List[int], repeat: int, appends: int = 100) -> List[Dict]:
+    """
+    save_assignment (main.py) et lecture complète (load_all) sur un store
+    contenant déjà `n` assignations, pour chaque backend.
+    """
+    catalog = synthetic_shoppers(100)
+    clients = synthetic_clients(min(max(sizes), POOL_MAX, 10_000))
+    results = []
+    for backend, store_cls in BACKENDS.items():
+        for n in sizes:
+            tmp = tempfile.mkdtemp(prefix="pershop-bench-")
+            try:
+                store = store_cls(os.path.join(tmp, f"assignments.{backend}"))
+                pairs = zip(_pool(clients, n), _pool(catalog, n))
+                # Remplissage par lots (non mesuré), sans garder 10⁶ dicts en mémoire
+                chunk: List[Dict] = []
+                for client, shopper in pairs:
+                    chunk.append(new_assignment(client, shopper))
+                    if len(chunk) >= 10_000:
+                        store.append_many(chunk)
+                        chunk = []
+                store.append_many(chunk)
+
+                extra = [new_assignment(c, s) for c, s in zip(_pool(clients, appends), _pool(catalog, appends))]
+
+                def save():
+                    for a in extra:
+                        store.append(a)
+
+                results.append(measure(f"save_assignment[{backend}]", n, appends, save, repeat))
+                results.append(measure(f"load_all[{backend}]", n, 1, store.load_all, repeat))
+                results.append(measure(
+                    f"load_shopper_assignments[{backend}]", n, 1,
+                    lambda: store.recent_for_shopper(catalog[0]["id"], 20), repeat,
+                ))
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def bench_prompt(sizes: List[int], repeat: int) -> List[Dict]:
+    catalog = synthetic_shoppers(100)
+    clients = synthetic_clients(min(max(sizes), POOL_MAX))
+    results = []
+    for n in sizes:
+        pairs = list(zip(_pool(clients, n), _pool(catalog, n)))
+
+        def build():
+            for client, shopper in pairs:
+                prebrief_prompt(client, shopper)
+
+        def template():
+            # Pré-brief local (repli sans Groq et mode rapide), raisons du match comprises
+            for client, shopper in pairs:
+                template_prebrief(client, shopper)
+
+        prompt = measure("prebrief_prompt", n, n, build, repeat)
+        sample = pairs[:1000]
+        prompt["tokens"] = sum(prebrief_prompt(c, s).tokens for c, s in sample) / len(sample)
+        results.append(prompt)
+        results.append(measure("template_prebrief", n, n, template, repeat))
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[List[int], int], List[Dict]]] = {
+    "match": bench_match,
+    "normalize_city": bench_normalize_city,
+    "budget": bench_budget_level,
+    "shortlist": bench_shortlist,
+    "store": bench_store,
+    "prompt": bench_prompt,
+}
+
+
+# ============================================================
+# 3. RAPPORT + COMPARAISON À LA RÉFÉRENCE
+# ============================================================
+
+def _key(result: Dict) -> str:
+    return f"{result['name']}@{result['size']}"
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[Dict]:
+    """Ajoute à chaque résultat son ratio à la référence ; renvoie les régressions."""
+    reference = {_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        ref = reference.get(_key(result))
+        if ref is None or not ref["per_op_us"]:
+            continue
+        result["baseline_per_op_us"] = ref["per_op_us"]
+        result["ratio"] = result["per_op_us"] / ref["per_op_us"]
+        if result["ratio"] > 1 + threshold:
+            regressions.append(result)
+    return regressions
+
+
+def print_table(results: List[Dict]):
+    print(f"{'benchmark':<38} {'taille':>9} {'µs/op':>12} {'op/s':>12} {'vs réf.':>9}")
+    for r in results:
+        ratio = f"x{r['ratio']:.2f}" if "ratio" in r else "-"
+        print(f"{r['name']:<38} {r['size']:>9} {r['per_op_us']:>12.2f} {r['ops_per_s']:>12.0f} {ratio:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne de Pershop Pilote.")
+    parser.add_argument("--min-exp", type=int, default=2, help="plus petite taille : 10^min-exp")
+    parser.add_argument("--max-exp", type=int, default=4, help="plus grande taille : 10^max-exp (6 max)")
+    parser.add_argument("--only", default="", help=f"sous-ensemble parmi : {','.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="écrire aussi le rapport comme référence")
+    parser.add_argument("--threshold", type=float, default=0.25, help="ralentissement toléré (0.25 = +25 %%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    if GROQ_ENABLED:
+        parser.error("client Groq actif : les benchmarks doivent tourner hors ligne")
+    names = [n for n in args.only.split(",") if n] or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"benchmark inconnu : {', '.join(sorted(unknown))}")
+    sizes = [10 ** e for e in range(args.min_exp, min(args.max_exp, 6) + 1)]
+
+    results: List[Dict] = []
+    for name in names:
+        print(f"→ {name}", file=sys.stderr, flush=True)
+        results.extend(BENCHMARKS[name](sizes, args.repeat))
+
+    regressions: List[Dict] = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "threshold": args.threshold,
+        },
+        "results": results,
+        "regressions": [_key(r) for r in regressions],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_table(results)
+    print(f"\nRapport : {args.output}")
+    if regressions:
+        print(f"{len(regressions)} régression(s) > {args.threshold:.0%} :")
+        for r in regressions:
+            print(f"  {_key(r)} x{r['ratio']:.2f}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import math
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# ============================================================
+# 1. GAZETTEER (COORDONNÉES HORS LIGNE)
+# ============================================================
+
+# Zone canonique (voir matching.zone_id) → (latitude, longitude)
+GAZETTEER: Dict[str, Tuple[float, float]] = {
+    # Zones du catalogue
+    "paris": (48.8566, 2.3522),
+    "lyon": (45.7640, 4.8357),
+    "marseille": (43.2965, 5.3698),
+    "bordeaux": (44.8378, -0.5792),
+    "lille": (50.6292, 3.0573),
+    "toulouse": (43.6047, 1.4442),
+    "nice": (43.7102, 7.2620),
+    "dubai": (25.2048, 55.2708),
+    "new york": (40.7128, -74.0060),
+    "montpellier": (43.6108, 3.8767),
+    "nantes": (47.2184, -1.5536),
+    "rennes": (48.1173, -1.6778),
+    "strasbourg": (48.5734, 7.7521),
+    "cannes": (43.5528, 7.0174),
+    "grenoble": (45.1885, 5.7245),
+    "poitiers": (46.5802, 0.3404),
+    "bruxelles": (50.8503, 4.3517),
+    # Villes clientes fréquentes
+    "versailles": (48.8049, 2.1204),
+    "saint etienne": (45.4397, 4.3872),
+    "toulon": (43.1242, 5.9280),
+    "nimes": (43.8367, 4.3601),
+    "avignon": (43.9493, 4.8055),
+    "antibes": (43.5808, 7.1239),
+    "monaco": (43.7384, 7.4246),
+    "menton": (43.7747, 7.4975),
+    "roubaix": (50.6942, 3.1746),
+    "tourcoing": (50.7239, 3.1612),
+    "annecy": (45.8992, 6.1294),
+    "chambery": (45.5646, 5.9178),
+    "dijon": (47.3220, 5.0415),
+    "tours": (47.3941, 0.6848),
+    "angers": (47.4784, -0.5632),
+    "le mans": (48.0061, 0.1996),
+    "brest": (48.3904, -4.4861),
+    "caen": (49.1829, -0.3707),
+    "rouen": (49.4432, 1.0999),
+    "le havre": (49.4944, 0.1079),
+    "reims": (49.2583, 4.0317),
+    "metz": (49.1193, 6.1757),
+    "nancy": (48.6921, 6.1844),
+    "mulhouse": (47.7508, 7.3359),
+    "clermont ferrand": (45.7772, 3.0870),
+    "limoges": (45.8336, 1.2611),
+    "la rochelle": (46.1603, -1.1511),
+    "biarritz": (43.4832, -1.5586),
+    "bayonne": (43.4929, -1.4748),
+    "pau": (43.2951, -0.3708),
+    "perpignan": (42.6887, 2.8948),
+    "geneve": (46.2044, 6.1432),
+    "lausanne": (46.5197, 6.6323),
+    "luxembourg": (49.6116, 6.1319),
+    "londres": (51.5074, -0.1278),
+    "abu dhabi": (24.4539, 54.3773),
+}
+
+
+# ============================================================
+# 2. DISTANCE + INDEX EN GRILLE
+# ============================================================
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class GeoGrid:
+    """
+    Index spatial en grille régulière (cellules de `cell_deg` degrés).
+    Une requête de rayon ne visite que les cellules de la boîte englobante,
+    puis filtre à la distance exacte.
+    """
+
+    def __init__(self, points: Dict[Hashable, Tuple[float, float]], cell_deg: float = 0.5):
+        self.cell_deg = cell_deg
+        self.points = dict(points)
+        self._cells: Dict[Tuple[int, int], List[Hashable]] = defaultdict(list)
+        for key, (lat, lon) in self.points.items():
+            self._cells[self._cell(lat, lon)].append(key)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def within(self, center: Tuple[float, float], radius_km: float) -> Dict[Hashable, float]:
+        """Clés situées à moins de `radius_km` du centre, avec leur distance."""
+        lat, lon = center
+        dlat = radius_km / 111.0
+        # 1° de longitude rétrécit avec la latitude (borne basse pour ne rien rater)
+        dlon = radius_km / max(111.0 * math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 1e-6)
+        lat_lo, lon_lo = self._cell(lat - dlat, lon - dlon)
+        lat_hi, lon_hi = self._cell(lat + dlat, lon + dlon)
+
+        found: Dict[Hashable, float] = {}
+        for i in range(lat_lo, lat_hi + 1):
+            for j in range(lon_lo, lon_hi + 1):
+                for key in self._cells.get((i, j), ()):
+                    dist = haversine_km(center, self.points[key])
+                    if dist <= radius_km:
+                        found[key] = dist
+        return found
+
+
+def coordinates(zone: str) -> Optional[Tuple[float, float]]:
+    """Coordonnées d'une zone canonique, None si elle n'est pas dans le gazetteer."""
+    return GAZETTEER.get(zone)
@@ -0,0 +1,204 @@
+import os
+import time
+from typing import Dict, Iterator, Optional, Union
+
+from groq import Groq
+from dotenv import load_dotenv
+
+from llm_cache import cache_key, cache_from_env
+from metrics import METRICS
+from llm_gateway import GroqGateway
+from prompts import BASE_SYSTEM, Prompt, prebrief_prompt, summary_prompt
+from prebrief_template import template_prebrief
+
+# ============================================================
+# IA GROQ
+# ============================================================
+
+load_dotenv()
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+groq_client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+GROQ_ENABLED = groq_client is not None
+
+MODEL = "llama-3.3-70b-versatile"
+SYSTEM_PROMPT = BASE_SYSTEM
+
+# Cache des réponses (réponses identiques pour un même profil client/shopper)
+llm_cache = cache_from_env()
+
+
+LLM_DISABLED_MESSAGE = (
+    "⚠️ IA désactivée (clé GROQ_API_KEY manquante). "
+    "Dans un environnement complet, ce texte serait généré par Groq."
+)
+LLM_ERROR_MESSAGE = "Erreur lors de la génération IA (Groq)."
+
+
+def call_llm(
+    prompt: str,
+    system: str = SYSTEM_PROMPT,
+    max_tokens: int = 700,
+    temperature: float = 0.5,
+    stream: bool = False,
+) -> Union[str, Iterator[str]]:
+    """
+    Appelle Groq et renvoie le texte complet.
+    Avec `stream=True`, renvoie un itérateur qui produit les morceaux de texte
+    au fil de l'eau (pratique avec `st.write_stream`).
+    """
+    if stream:
+        return _stream_llm(prompt, system, max_tokens, temperature)
+
+    if not GROQ_ENABLED:
+        return LLM_DISABLED_MESSAGE
+
+    key = cache_key(MODEL, system, prompt, max_tokens, temperature)
+    if llm_cache is not None:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            METRICS.incr("llm_cache_hits")
+            return cached
+
+    try:
+        with METRICS.span("groq", stream=False) as attrs:
+            resp = groq_client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            attrs.update(_record_usage(getattr(resp, "usage", None)))
+        text = resp.choices[0].message.content.strip()
+    except Exception as e:
+        print("Erreur Groq :", repr(e))
+        METRICS.incr("groq_errors")
+        return LLM_ERROR_MESSAGE
+
+    # Seules les réponses réussies sont mises en cache
+    if llm_cache is not None:
+        llm_cache.set(key, text)
+    return text
+
+
+def _stream_llm(prompt: str, system: str, max_tokens: int, temperature: float) -> Iterator[str]:
+    if not GROQ_ENABLED:
+        yield LLM_DISABLED_MESSAGE
+        return
+
+    key = cache_key(MODEL, system, prompt, max_tokens, temperature)
+    if llm_cache is not None:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            METRICS.incr("llm_cache_hits")
+            yield cached
+            return
+
+    parts = []
+    start = time.perf_counter()
+    usage = None
+    try:
+        chunks = groq_client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        for chunk in chunks:
+            # Groq renvoie l'usage dans le dernier morceau (champ x_groq)
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if not parts:
+                delta = delta.lstrip()
+                if not delta:
+                    continue
+                METRICS.observe("groq_first_token", time.perf_counter() - start)
+            parts.append(delta)
+            yield delta
+    except Exception as e:
+        print("Erreur Groq :", repr(e))
+        METRICS.incr("groq_errors")
+        yield ("\n\n" if parts else "") + LLM_ERROR_MESSAGE
+        return
+    METRICS.observe("groq", time.perf_counter() - start, stream=True, **_record_usage(usage))
+
+    text = "".join(parts).strip()
+    if llm_cache is not None and text:
+        llm_cache.set(key, text)
+
+
+def _record_usage(usage) -> Dict:
+    """Compteurs de tokens à partir de l'objet `usage` de la réponse Groq."""
+    if usage is None:
+        return {}
+    tokens = {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+    for name, value in tokens.items():
+        METRICS.incr(f"groq_{name}", value)
+    return tokens
+
+
+def _count_prompt(prompt: Prompt):
+    """Tokens estimés du prompt envoyé (comptés seulement si Groq est actif)."""
+    if GROQ_ENABLED:
+        METRICS.incr("prompt_tokens_estimated", prompt.tokens)
+
+
+def generate_ai_summary(client: Dict, shopper: Dict, stream: bool = False) -> Union[str, Iterator[str]]:
+    prompt = summary_prompt(client, shopper)
+    _count_prompt(prompt)
+    if stream:
+        return METRICS.timed_iter(
+            "generate_ai_summary", call_llm(prompt.user, system=prompt.system, stream=True)
+        )
+    with METRICS.span("generate_ai_summary"):
+        return call_llm(prompt.user, system=prompt.system)
+
+
+@METRICS.timed("generate_prebrief")
+def generate_prebrief(client: Dict, shopper: Dict) -> str:
+    if not GROQ_ENABLED:
+        return template_prebrief(client, shopper)
+    prompt = prebrief_prompt(client, shopper)
+    _count_prompt(prompt)
+    return call_llm(prompt.user, system=prompt.system)
+
+
+async def agenerate_prebrief(
+    client: Dict,
+    shopper: Dict,
+    gateway: Optional[GroqGateway],
+    max_tokens: int = 700,
+    temperature: float = 0.5,
+) -> str:
+    """
+    Variante asynchrone de generate_prebrief, via la passerelle (worker en volume).
+    Partage le cache de call_llm ; lève LLMGatewayError si Groq échoue définitivement.
+    """
+    if gateway is None:
+        return template_prebrief(client, shopper)
+
+    prompt = prebrief_prompt(client, shopper)
+    _count_prompt(prompt)
+    key = cache_key(MODEL, prompt.system, prompt.user, max_tokens, temperature)
+    if llm_cache is not None:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            METRICS.incr("llm_cache_hits")
+            return cached
+
+    with METRICS.span("generate_prebrief"):
+        text = await gateway.complete(prompt.user, prompt.system, MODEL, max_tokens, temperature)
+    if llm_cache is not None:
+        llm_cache.set(key, text)
+    return text
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# ============================================================
+# CACHE DES RÉPONSES LLM (MÉMOIRE LRU + DISQUE SQLITE)
+# ============================================================
+
+def cache_key(model: str, system: str, prompt: str, max_tokens: int, temperature: float) -> str:
+    """Empreinte stable d'une requête LLM (mêmes paramètres → même clé)."""
+    payload = json.dumps(
+        [model, system, prompt, max_tokens, temperature],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Cache adressé par contenu à deux niveaux :
+    - mémoire : LRU borné à `max_memory_entries`
+    - disque : table SQLite bornée à `max_disk_entries` (les plus anciennes sortent)
+    Une entrée plus vieille que `ttl` secondes est ignorée et supprimée.
+    `path=None` désactive le niveau disque.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = "llm_cache.db",
+        ttl: float = 24 * 3600,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10_000,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ---------- disque ----------
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, created REAL NOT NULL, response TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache (created)")
+            self._local.conn = conn
+        return conn
+
+    # ---------- mémoire ----------
+
+    def _remember(self, key: str, created: float, response: str):
+        with self._lock:
+            self._memory[key] = (created, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    # ---------- API ----------
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if not self._expired(hit[0]):
+                    self._memory.move_to_end(key)
+                    return hit[1]
+                del self._memory[key]
+
+        conn = self._disk()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT created, response FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        created, response = row
+        if self._expired(created):
+            with conn:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        self._remember(key, created, response)
+        return response
+
+    def set(self, key: str, response: str):
+        created = time.time()
+        self._remember(key, created, response)
+
+        conn = self._disk()
+        if conn is None:
+            return
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, created, response) VALUES (?, ?, ?)",
+                (key, created, response),
+            )
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        conn = self._disk()
+        if conn is not None:
+            with conn:
+                conn.execute("DELETE FROM llm_cache")
+
+
+def cache_from_env() -> Optional[LLMCache]:
+    """Construit le cache à partir des variables d'environnement (LLM_CACHE=0 pour le couper)."""
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    return LLMCache(
+        path=os.getenv("LLM_CACHE_PATH", "llm_cache.db") or None,
+        ttl=float(os.getenv("LLM_CACHE_TTL", 24 * 3600)),
+        max_memory_entries=int(os.getenv("LLM_CACHE_MAX_MEMORY", 256)),
+        max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK", 10_000)),
+    )
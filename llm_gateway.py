@@ -0,0 +1,204 @@
+import os
+import time
+import random
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+from metrics import METRICS
+from prompts import count_tokens
+
+# ============================================================
+# PASSERELLE GROQ ASYNCHRONE
+# ============================================================
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+# Statuts HTTP transitoires : on retente
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMGatewayError(Exception):
+    """Échec définitif d'un appel (erreur non transitoire, ou délai/tentatives épuisés)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """
+    Seau à jetons : `rate` jetons par seconde, au plus `capacity` en réserve.
+    `acquire(n)` attend que `n` jetons soient disponibles.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)  # une requête plus grosse que le seau passe seau plein
+        async with self._lock:  # premier arrivé, premier servi
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+
+class GroqGateway:
+    """
+    Client Groq asynchrone pour les traitements en volume (worker de pré-briefs) :
+    - un seul client HTTP avec pool de connexions ;
+    - au plus `max_concurrency` requêtes en vol ;
+    - quotas requêtes/minute et tokens/minute (seaux à jetons) ;
+    - nouvelles tentatives sur 429 / 5xx / erreurs réseau, backoff exponentiel
+      avec jitter (ou délai Retry-After du serveur) ;
+    - délai maximal par appel, tentatives comprises.
+    `base_url` permet de viser un serveur local de test, `transport` un
+    transport httpx simulé (httpx.MockTransport dans les tests).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = GROQ_BASE_URL,
+        max_concurrency: int = 8,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 6000,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        deadline: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 6))
+        self._tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=httpx.Timeout(deadline),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "GroqGateway":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Full jitter : uniforme entre 0 et le plafond exponentiel
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def complete(
+        self,
+        prompt: str,
+        system: str,
+        model: str,
+        max_tokens: int = 700,
+        temperature: float = 0.5,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Texte de la réponse ; lève LLMGatewayError si l'appel échoue définitivement."""
+        deadline = deadline or self.deadline
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        cost = count_tokens(system) + count_tokens(prompt) + max_tokens
+        try:
+            return await asyncio.wait_for(self._complete(payload, cost), timeout=deadline)
+        except asyncio.TimeoutError:
+            METRICS.incr("groq_errors")
+            raise LLMGatewayError(f"délai de {deadline:.0f}s dépassé") from None
+
+    async def _complete(self, payload: Dict, cost: int) -> str:
+        attempt = 0
+        while True:
+            await self._requests.acquire()
+            await self._tokens.acquire(cost)
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    resp = await self._http.post("/chat/completions", json=payload)
+                except httpx.TransportError as e:
+                    status, error, retry_after = None, repr(e), None
+                else:
+                    if resp.status_code == 200:
+                        return self._parse(resp.json(), time.perf_counter() - start)
+                    status, error = resp.status_code, resp.text[:200]
+                    retry_after = resp.headers.get("retry-after")
+
+            if status == 429:
+                METRICS.incr("groq_rate_limited")
+            if (status is not None and status not in RETRYABLE_STATUS) or attempt >= self.max_retries:
+                METRICS.incr("groq_errors")
+                raise LLMGatewayError(f"Groq {status or 'réseau'} : {error}", status)
+
+            delay = self._backoff(attempt, retry_after)
+            # Attente avant la nouvelle tentative : p50/p99 et trace (statut, n° de tentative)
+            METRICS.observe("groq_backoff", delay, status=status, attempt=attempt + 1)
+            METRICS.incr("groq_retries")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _parse(self, data: Dict, latency: float) -> str:
+        usage = data.get("usage") or {}
+        tokens = {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
+        for name, value in tokens.items():
+            METRICS.incr(f"groq_{name}", value)
+        METRICS.observe("groq", latency, stream=False, **tokens)
+        try:
+            return data["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, AttributeError):
+            raise LLMGatewayError("réponse Groq inattendue") from None
+
+
+def gateway_from_env() -> Optional[GroqGateway]:
+    """Passerelle configurée par l'environnement ; None sans GROQ_API_KEY."""
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return None
+    return GroqGateway(
+        api_key,
+        base_url=os.getenv("GROQ_BASE_URL", GROQ_BASE_URL),
+        max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", 8)),
+        requests_per_minute=float(os.getenv("GROQ_RPM", 30)),
+        tokens_per_minute=float(os.getenv("GROQ_TPM", 6000)),
+        max_retries=int(os.getenv("GROQ_MAX_RETRIES", 4)),
+        deadline=float(os.getenv("GROQ_DEADLINE", 60)),
+    )
@@ -1,13 +1,16 @@
 import os
-import json
-from uuid import uuid4
-from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 import streamlit as st
-from groq import Groq
 from dotenv import load_dotenv
 from shoppers_data import SHOPPERS
+from matching import ShopperIndex, top_matches
+from storage import AssignmentStore, new_assignment, store_from_env
+from prebrief_queue import PrebriefQueue, queue_from_env
+from prebrief_template import TEMPLATE_STATUS, shed_prebrief, template_prebrief
+from llm import GROQ_ENABLED, generate_ai_summary
+from metrics import METRICS
+from semantic import HybridScorer, hybrid_from_env
 # ============================================================
 # 0. CONFIG GLOBALE + CSS CUSTOM
 # ============================================================
@@ -178,11 +181,7 @@ def inject_css():
 inject_css()
 
 load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-groq_client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
-GROQ_ENABLED = groq_client is not None
 
-ASSIGNMENTS_PATH = "assignments.jsonl"
 
 
 
@@ -190,212 +189,114 @@ ASSIGNMENTS_PATH = "assignments.jsonl"
 # 2. PERSISTENCE ASSIGNATIONS
 # ============================================================
 
-def save_assignment(assignment: Dict):
-    with open(ASSIGNMENTS_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(assignment, ensure_ascii=False) + "\n")
-
-
-def load_assignments() -> List[Dict]:
-    if not os.path.exists(ASSIGNMENTS_PATH):
-        return []
-    assignments = []
-    with open(ASSIGNMENTS_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                assignments.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
-    return assignments
+# Ressources partagées entre les reruns et les sessions Streamlit
+@st.cache_resource
+def get_assignment_store() -> AssignmentStore:
+    # Backend choisi via ASSIGNMENTS_BACKEND / ASSIGNMENTS_PATH ("jsonl" par défaut)
+    return store_from_env()
 
 
-# ============================================================
-# 3. MATCHING
-# ============================================================
+@st.cache_resource
+def get_prebrief_queue() -> PrebriefQueue:
+    # Pré-briefs générés hors requête par prebrief_worker.py
+    return queue_from_env()
 
-def compute_budget_level(budget: str) -> str:
-    txt = budget.lower()
-    if "moins" in txt or "<" in txt:
-        return "bas"
-    if "plus" in txt or "1000" in txt:
-        return "élevé"
-    if "100 - 300" in txt or "300 - 1000" in txt:
-        return "moyen"
-    return "moyen"
 
-import unicodedata
-import re
+ASSIGNMENT_STORE = get_assignment_store()
+PREBRIEF_QUEUE = get_prebrief_queue()
 
-def normalize_city(name: str) -> str:
-    """
-    Normalise un nom de ville pour le matching :
-    - minuscules
-    - sans accents
-    - on garde lettres / chiffres / espaces
-    - on compacte les espaces
-    """
-    if not name:
-        return ""
-    # minuscules
-    text = name.lower().strip()
-    # retirer accents
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-    # garder lettres/chiffres/espaces
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    # compacter les espaces
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-
-def match(client: Dict, shopper: Dict) -> Tuple[int, List[str]]:
-    score = 0
-    reasons: List[str] = []
-
-    city_client_norm = normalize_city(client.get("city", ""))
-    city_shopper_norm = normalize_city(shopper.get("zone", ""))
-
-    if city_client_norm:
-        same_area = (
-            city_client_norm in city_shopper_norm
-            or city_shopper_norm in city_client_norm
-        )
+# Nombre de clients affichés par page dans l'espace personal shopper
+ASSIGNMENTS_PAGE_SIZE = 20
 
-        # Si le client veut absolument du présentiel → la ville devient bloquante
-        if client.get("mode") == "presentiel":
-            if not same_area:
-                return 0, []  # pas dans la zone, on élimine
-            else:
-                score += 2
-                reasons.append("Basé(e) dans ta ville ou à proximité (présentiel)")
+# Rafraîchissement en direct de l'espace shopper (secondes, 0 = désactivé)
+LIVE_REFRESH_SECONDS = float(os.getenv("LIVE_REFRESH_SECONDS", 0))
 
-        # Si visio ou peu_importe → pas bloquant, mais on donne un bonus si c'est proche
-        else:
-            if same_area:
-                score += 1
-                reasons.append("Dans ta zone géographique (utile si un jour tu veux du présentiel)")
-
-    # Style
-    if client["style"]:
-        if any(style_item in shopper["styles"] for style_item in client["style"]):
-            score += 2
-            reasons.append("Style compatible avec ce que tu recherches")
-
-    # Objectif
-    if client["objective"]:
-        if any(client["objective"].lower() in spec.lower() for spec in shopper["specialites"]):
-            score += 2
-            reasons.append("Spécialisé(e) sur ton objectif principal")
-
-    # Budget
-    level = compute_budget_level(client["budget"])
-    if level in shopper["niveau_budget"]:
-        score += 2
-        reasons.append("Adapté à ton budget vestimentaire")
-
-    # Mode
-    if client["mode"] == "visio":
-        if any("visio" in f for f in shopper["formats"]):
-            score += 1
-            reasons.append("Peut te proposer une séance en visio")
-    elif client["mode"] == "presentiel":
-        if any(f in shopper["formats"] for f in ["magasin", "domicile", "presentiel", "visio/presentiel"]):
-            score += 1
-            reasons.append("Peut te recevoir en présentiel")
-
-    # Texte libre
-    if client["extra_info"]:
-        text = client["extra_info"].lower()
-        for field in ["styles", "specialites", "tags"]:
-            for item in shopper[field]:
-                if item.lower().replace("_", " ") in text:
-                    score += 1
-                    reasons.append(f"Correspond à ton besoin : {item}")
-                    break
-
-    return score, reasons
 
+@METRICS.timed("save_assignment")
+def save_assignment(assignment: Dict):
+    ASSIGNMENT_STORE.append(assignment)
 
-# ============================================================
-# 4. IA GROQ
-# ============================================================
 
-def call_llm(prompt: str) -> str:
-    if not GROQ_ENABLED:
-        return (
-            "⚠️ IA désactivée (clé GROQ_API_KEY manquante). "
-            "Dans un environnement complet, ce texte serait généré par Groq."
-        )
-    try:
-        resp = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "Tu es un expert en mode et personal shopping."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=700,
-            temperature=0.5,
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception as e:
-        print("Erreur Groq :", repr(e))
-        return "Erreur lors de la génération IA (Groq)."
+# Les lectures sont mises en cache par version du store : toute écriture
+# (nouvelle assignation, pré-brief prêt) change la clé et invalide le cache.
+@st.cache_data(show_spinner=False, max_entries=512)
+def _cached_shopper_page(shopper_id, page: int, version) -> List[Dict]:
+    return ASSIGNMENT_STORE.recent_for_shopper(
+        shopper_id, ASSIGNMENTS_PAGE_SIZE, page * ASSIGNMENTS_PAGE_SIZE
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _cached_shopper_count(shopper_id, version) -> int:
+    return ASSIGNMENT_STORE.count_for_shopper(shopper_id)
+
 
+@METRICS.timed("load_shopper_assignments")
+def load_shopper_assignments(shopper_id, page: int = 0) -> List[Dict]:
+    """Page `page` des assignations d'un shopper, plus récentes en premier."""
+    return _cached_shopper_page(shopper_id, page, ASSIGNMENT_STORE.version())
 
-def generate_ai_summary(client: Dict, shopper: Dict) -> str:
-    prompt = f"""
-Client :
-{client}
 
-Personal shopper :
-{shopper}
+@METRICS.timed("count_shopper_assignments")
+def count_shopper_assignments(shopper_id) -> int:
+    return _cached_shopper_count(shopper_id, ASSIGNMENT_STORE.version())
 
-Explique en 3 à 4 phrases maximum, en français, pourquoi ce personal shopper
-est bien adapté à ce client. Parle au client à la deuxième personne ("tu").
-Ne fais pas de liste à puces, répond sous forme de paragraphe.
-"""
-    return call_llm(prompt)
 
+def live_feed(shopper_id) -> Optional[Dict]:
+    """
+    Première page d'un shopper tenue à jour dans la session : chargée une fois
+    via l'index, puis complétée avec les seules lignes ajoutées au journal
+    depuis le passage précédent. None si le backend ne se suit pas (SQLite).
+    """
+    key = f"live_feed_{shopper_id}"
+    feed = st.session_state.get(key)
+    if feed is None:
+        tail = ASSIGNMENT_STORE.tail()  # ouvert avant la lecture : rien ne se perd entre les deux
+        if tail is None:
+            return None
+        feed = {
+            "tail": tail,
+            "items": list(load_shopper_assignments(shopper_id, 0)),
+            "total": count_shopper_assignments(shopper_id),
+        }
+        st.session_state[key] = feed
+        return feed
+
+    items = feed["items"]
+    for a in feed["tail"].poll():
+        if a.get("shopper_id") != shopper_id:
+            continue
+        position = next((i for i, x in enumerate(items) if x.get("id") == a.get("id")), None)
+        if position is not None:
+            items[position] = a  # pré-brief prêt, etc.
+        elif not items or a.get("timestamp", "") >= items[0].get("timestamp", ""):
+            items.insert(0, a)
+            feed["total"] += 1
+        # sinon : mise à jour d'une assignation plus ancienne, hors première page
+    del items[ASSIGNMENTS_PAGE_SIZE:]
+    return feed
 
-def generate_prebrief(client: Dict, shopper: Dict) -> str:
-    prenom = client.get("prenom") or "le client"
-    prompt = f"""
-Tu es un copilote IA pour personal shoppers sur une plateforme de personal shopping phygital.
 
-Voici le profil client (données JSON) :
-{client}
+# ============================================================
+# 3. MATCHING
+# ============================================================
 
-Voici le profil du personal shopper (données JSON) :
-{shopper}
+# Index du catalogue construit une seule fois pour tout le processus
+@st.cache_resource
+def get_shopper_index() -> ShopperIndex:
+    return ShopperIndex(SHOPPERS)
 
-Rédige un pré-brief structuré en **Markdown** pour préparer une séance de personal shopping.
-Respecte exactement cette structure :
 
-1. Première ligne : un titre en gras de ce type :  
-   **Pré-brief pour la séance de personal shopping avec {prenom}**
+SHOPPER_INDEX = get_shopper_index()
 
-2. Ensuite, crée les sections avec des titres de niveau 3 (###) :
-   ### 1. Résumé du client
-   ### 2. Points d'attention
-   ### 3. Pistes de préparation
-   ### 4. Recommandations de déroulé de séance
 
-3. Dans chaque section, utilise des listes à puces avec des labels en gras, par exemple :
-   * **Style** : ...
-   * **Budget** : ...
-   * **Objectif** : ...
+# Mode hybride (MATCHING_MODE=hybrid) : vecteurs du catalogue synchronisés au démarrage
+@st.cache_resource
+def get_hybrid_scorer() -> Optional[HybridScorer]:
+    return hybrid_from_env(SHOPPER_INDEX)
 
-Contenu attendu :
-- Dans "Résumé du client" : style, budget, objectif, contexte pro / moment de vie.
-- Dans "Points d'attention" : confiance en soi, freins possibles, sensibilités.
-- Dans "Pistes de préparation" : idées de silhouettes, pièces clés, où chercher (types de boutiques ou niveaux de gamme).
-- Dans "Recommandations de déroulé de séance" : format (présentiel/visio), étapes principales de la séance.
 
-Réponds uniquement avec le Markdown final, sans commentaire autour.
-"""
-    return call_llm(prompt)
+HYBRID_SCORER = get_hybrid_scorer()
 
 
 # ============================================================
@@ -602,13 +503,10 @@ def page_client():
         return
 
     with st.spinner("Analyse de ton profil et matching avec les personal shoppers…"):
-        scored: List[Tuple[Dict, int, List[str]]] = []
-        for sh in SHOPPERS:
-            sc, reasons = match(client, sh)
-            scored.append((sh, sc, reasons))
-
-        scored = [item for item in scored if item[1] > 0]
-        scored.sort(key=lambda x: x[1], reverse=True)
+        with METRICS.span("match"):
+            scored: List[Tuple[Dict, int, List[str]]] = top_matches(
+                client, SHOPPER_INDEX, k=3, semantic=HYBRID_SCORER
+            )
 
         if not scored:
             st.error(
@@ -617,17 +515,19 @@ def page_client():
             return
 
         best_shopper, best_score, best_reasons = scored[0]
-        prebrief = generate_prebrief(client, best_shopper)
-
-        assignment = {
-            "id": str(uuid4()),
-            "timestamp": datetime.utcnow().isoformat(),
-            "shopper_id": best_shopper["id"],
-            "shopper_nom": best_shopper["nom"],
-            "client": client,
-            "prebrief": prebrief,
-        }
-        save_assignment(assignment)
+
+        # Le pré-brief n'est lu que par le shopper : on sauvegarde tout de suite
+        # et sa génération est confiée au worker (prebrief_worker.py).
+        assignment = new_assignment(client, best_shopper)
+        if shed_prebrief(PREBRIEF_QUEUE):
+            # Délestage : pré-brief local immédiat, la file n'est pas sollicitée
+            assignment["prebrief"] = template_prebrief(client, best_shopper, best_reasons)
+            assignment["prebrief_status"] = TEMPLATE_STATUS
+            save_assignment(assignment)
+        else:
+            save_assignment(assignment)
+            with METRICS.span("enqueue_prebrief"):
+                PREBRIEF_QUEUE.enqueue(assignment)
 
     st.markdown("### Short-list de personal shoppers recommandés")
 
@@ -651,10 +551,7 @@ def page_client():
     st.markdown("---")
     st.markdown(f"### Focus IA sur ton meilleur match : **{best_shopper['nom']}**")
 
-    with st.spinner("Génération d’un résumé personnalisé…"):
-        summary = generate_ai_summary(client, best_shopper)
-
-    st.write(summary)
+    st.write_stream(generate_ai_summary(client, best_shopper, stream=True))
     st.info(
         "Ton/ta personal shopper reçoit en coulisses un pré-brief détaillé pour préparer au mieux votre séance."
     )
@@ -680,6 +577,44 @@ def format_prebrief_markdown(prebrief: str) -> str:
 
     return text.strip()
 
+
+@st.cache_data(show_spinner=False, max_entries=2048)
+def cached_prebrief_markdown(assignment_id: str, prebrief_status: str, _raw_prebrief: str) -> str:
+    """
+    Pré-brief formaté, mémorisé par assignation. Le texte brut (préfixé `_`)
+    n'est pas haché : il ne change qu'avec le statut du pré-brief.
+    """
+    return format_prebrief_markdown(_raw_prebrief)
+
+
+@st.cache_data(show_spinner=False)
+def shopper_options() -> Dict[str, int]:
+    return {f"{s['nom']} – {s['zone']}": s["id"] for s in SHOPPERS}
+
+
+def metrics_panel():
+    """Panneau admin (METRICS_PANEL=1) : latences p50 / p99 du processus."""
+    with st.expander("⏱️ Latences (admin)"):
+        rows = METRICS.summary()
+        if not rows:
+            st.caption("Aucune mesure pour le moment.")
+            return
+        st.dataframe(
+            [
+                {
+                    "étape": r["span"],
+                    "appels": r["count"],
+                    "p50 (ms)": round(r["p50_ms"], 1),
+                    "p99 (ms)": round(r["p99_ms"], 1),
+                }
+                for r in rows
+            ],
+            hide_index=True,
+        )
+        counters = METRICS.counters()
+        if counters:
+            st.caption(" – ".join(f"{k} : {v:g}" for k, v in sorted(counters.items())))
+
 # ============================================================
 # 6. UI – VUE PERSONAL SHOPPER
 # ============================================================
@@ -718,62 +653,105 @@ def page_shopper():
         unsafe_allow_html=True,
     )
 
+    if os.getenv("METRICS_PANEL") == "1":
+        metrics_panel()
+
     # Sélection du PS
-    options = {f"{s['nom']} – {s['zone']}": s["id"] for s in SHOPPERS}
+    options = shopper_options()
     label = st.selectbox("Votre profil personal shopper", [""] + list(options.keys()))
 
     if not label or label not in options:
         return
 
     shopper_id = options[label]
-    shopper = next(s for s in SHOPPERS if s["id"] == shopper_id)
-
-    assignments = load_assignments()
-    my_assignments = [a for a in assignments if a.get("shopper_id") == shopper_id]
+    shopper = SHOPPER_INDEX.by_id[shopper_id]
 
     st.markdown(f"### Clients assignés à **{shopper['nom']}**")
+    shopper_assignments(shopper_id)
+
 
-    if not my_assignments:
+def shopper_assignments(shopper_id):
+    """Clients d'un shopper, paginés ; rafraîchis en continu si LIVE_REFRESH_SECONDS > 0."""
+    feed = live_feed(shopper_id) if LIVE_REFRESH_SECONDS > 0 else None
+    total = feed["total"] if feed else count_shopper_assignments(shopper_id)
+
+    if not total:
         st.info("Aucun client n’a encore été assigné à ce profil.")
         return
 
-    for a in reversed(my_assignments):  # plus récents en premier
-        client = a["client"]
-        raw_prebrief = a["prebrief"]
+    page = 0
+    n_pages = (total + ASSIGNMENTS_PAGE_SIZE - 1) // ASSIGNMENTS_PAGE_SIZE
+    if n_pages > 1:
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1) - 1
+
+    if feed and page == 0:
+        my_assignments = feed["items"]
+    else:
+        my_assignments = load_shopper_assignments(shopper_id, page)
+
+    for a in my_assignments:  # plus récents en premier
+        render_assignment(a)
+
+
+if LIVE_REFRESH_SECONDS > 0:
+    # Seul ce fragment est réexécuté à chaque intervalle, pas la page entière
+    shopper_assignments = st.fragment(run_every=LIVE_REFRESH_SECONDS)(shopper_assignments)
+
+
+def render_assignment(a: Dict):
+    client = a["client"]
+    # Anciennes assignations : pré-brief généré en ligne, donc déjà prêt
+    prebrief_status = a.get("prebrief_status", "ready")
+    raw_prebrief = a.get("prebrief", "")
+    if a.get("id"):
+        prebrief = cached_prebrief_markdown(a["id"], prebrief_status, raw_prebrief)
+    else:
         prebrief = format_prebrief_markdown(raw_prebrief)
-        timestamp = a.get("timestamp", "")[:19].replace("T", " ")
-
-        titre_client = (client.get("prenom") or "Client") + " " + (client.get("nom") or "")
-
-        with st.expander(f"{titre_client} — {timestamp}"):
-            col1, col2 = st.columns(2)
-
-            # --------- COLONNE 1 : profil client ---------
-            with col1:
-                st.markdown("#### Profil client")
-                st.markdown(
-                    f"""
-                    - **Ville :** {client.get('city', 'N/A')}
-                    - **Genre :** {client.get('gender', 'N/A')}
-                    - **Style souhaité :** {', '.join(client.get('style', [])) or 'N/A'}
-                    - **Budget :** {client.get('budget', 'N/A')}
-                    - **Objectif :** {client.get('objective', 'N/A') or 'Non précisé'}
-                    - **Moment de vie :** {client.get('life_event', 'N/A')}
-                    - **Confiance en soi :** {"Oui" if client.get('needs_confidence') else "Non"}
-                    """
-                )
-                extra = client.get("extra_info", "")
-                if extra:
-                    st.markdown("**Notes client :**")
-                    st.write(extra)
-
-            # --------- COLONNE 2 : pré-brief IA ---------
-            with col2:
-                st.markdown("#### Pré-brief IA pour préparer la séance")
-                # On affiche le pré-brief dans un bloc stylé mais avec vrai Markdown
-                st.markdown("<div class='prebrief-block'>", unsafe_allow_html=True)
-                st.markdown(prebrief)
-                st.markdown("</div>", unsafe_allow_html=True)
+    timestamp = a.get("timestamp", "")[:19].replace("T", " ")
+
+    titre_client = (client.get("prenom") or "Client") + " " + (client.get("nom") or "")
+
+    badge = " — ⏳ pré-brief en préparation" if prebrief_status == "pending" else ""
+
+    with st.expander(f"{titre_client} — {timestamp}{badge}"):
+        col1, col2 = st.columns(2)
+
+        # --------- COLONNE 1 : profil client ---------
+        with col1:
+            st.markdown("#### Profil client")
+            st.markdown(
+                f"""
+                - **Ville :** {client.get('city', 'N/A')}
+                - **Genre :** {client.get('gender', 'N/A')}
+                - **Style souhaité :** {', '.join(client.get('style', [])) or 'N/A'}
+                - **Budget :** {client.get('budget', 'N/A')}
+                - **Objectif :** {client.get('objective', 'N/A') or 'Non précisé'}
+                - **Moment de vie :** {client.get('life_event', 'N/A')}
+                - **Confiance en soi :** {"Oui" if client.get('needs_confidence') else "Non"}
+                """
+            )
+            extra = client.get("extra_info", "")
+            if extra:
+                st.markdown("**Notes client :**")
+                st.write(extra)
+
+        # --------- COLONNE 2 : pré-brief IA ---------
+        with col2:
+            st.markdown("#### Pré-brief IA pour préparer la séance")
+            if prebrief_status == "pending":
+                st.info("Le pré-brief est en cours de génération, revenez dans quelques instants.")
+                return
+            if prebrief_status == "skipped":
+                st.info("Aucun pré-brief n'a été demandé pour ce client (import en masse).")
+                return
+            if prebrief_status == "failed":
+                st.warning("La génération du pré-brief a échoué.", icon="⚠️")
+            if prebrief_status == TEMPLATE_STATUS:
+                st.caption("Pré-brief généré automatiquement à partir du profil (IA indisponible ou forte charge).")
+            # On affiche le pré-brief dans un bloc stylé mais avec vrai Markdown
+            st.markdown("<div class='prebrief-block'>", unsafe_allow_html=True)
+            st.markdown(prebrief)
+            st.markdown("</div>", unsafe_allow_html=True)
 
 
 
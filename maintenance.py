@@ -0,0 +1,91 @@
+import os
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from storage import JsonlAssignmentStore, store_from_env
+
+# ============================================================
+# MAINTENANCE DU JOURNAL DES ASSIGNATIONS (JSONL)
+# ============================================================
+# À lancer périodiquement (cron), en parallèle de l'application :
+#   python maintenance.py --max-size-mb 64 --max-age-days 7 --retention-days 365
+
+
+def _days_ago(days: float) -> str:
+    return (datetime.utcnow() - timedelta(days=days)).isoformat()
+
+
+def maintain(
+    store: JsonlAssignmentStore,
+    max_size_mb: float = 64,
+    max_age_days: Optional[float] = None,
+    retention_days: Optional[float] = None,
+    archive_dir: Optional[str] = None,
+    force: bool = False,
+) -> Dict:
+    """
+    Scelle le journal actif s'il dépasse `max_size_mb` ou si sa plus ancienne
+    assignation a plus de `max_age_days` jours, puis retire les segments
+    antérieurs à la fenêtre de rétention (archivés si `archive_dir`).
+    """
+    report = {"segment": None, "corrupt_lines": 0, "expired": 0}
+
+    size = os.path.getsize(store.path) if os.path.exists(store.path) else 0
+    oldest = store.oldest_timestamp()
+    too_big = size >= max_size_mb * 1024 * 1024
+    too_old = max_age_days is not None and oldest is not None and oldest < _days_ago(max_age_days)
+    if force or too_big or too_old:
+        store.corrupt_lines = 0
+        report["segment"] = store.rotate()
+        report["corrupt_lines"] = store.corrupt_lines
+
+    if retention_days is not None:
+        report["expired"] = store.expire(_days_ago(retention_days), archive_dir)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rotation, compaction et rétention du journal des assignations."
+    )
+    parser.add_argument(
+        "--max-size-mb", type=float, default=64, help="sceller le journal actif au-delà de cette taille"
+    )
+    parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=None,
+        help="sceller aussi le journal actif dès que sa plus ancienne assignation a N jours",
+    )
+    parser.add_argument(
+        "--retention-days",
+        type=float,
+        default=None,
+        help="retirer les segments dont toutes les assignations ont plus de N jours",
+    )
+    parser.add_argument("--archive-dir", default=None, help="archiver les segments retirés au lieu de les supprimer")
+    parser.add_argument("--force", action="store_true", help="sceller le journal actif quelle que soit sa taille")
+    args = parser.parse_args()
+
+    store = store_from_env()
+    if not isinstance(store, JsonlAssignmentStore):
+        print("Maintenance réservée au backend jsonl (SQLite gère son propre stockage).")
+        return
+
+    report = maintain(
+        store, args.max_size_mb, args.max_age_days, args.retention_days, args.archive_dir, args.force
+    )
+    if report["segment"]:
+        print(f"Journal scellé dans {report['segment']}")
+        if report["corrupt_lines"]:
+            print(f"{report['corrupt_lines']} ligne(s) illisible(s) écartée(s)")
+    if report["expired"]:
+        where = f"archivées dans {args.archive_dir}" if args.archive_dir else "supprimées"
+        print(f"{report['expired']} assignation(s) hors rétention {where}")
+    if not report["segment"] and not report["expired"]:
+        print("Rien à faire.")
+
+
+if __name__ == "__main__":
+    main()
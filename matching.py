@@ -0,0 +1,733 @@
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Tuple, Set, Iterable, Optional, Hashable
+
+import numpy as np
+
+from automaton import AhoCorasick
+from geo import GAZETTEER, GeoGrid, coordinates, haversine_km
+from shoppers_data import SHOPPERS
+
+# ============================================================
+# 1. NORMALISATION
+# ============================================================
+
+def compute_budget_level(budget: str) -> str:
+    txt = budget.lower()
+    if "moins" in txt or "<" in txt:
+        return "bas"
+    if "plus" in txt or "1000" in txt:
+        return "élevé"
+    if "100 - 300" in txt or "300 - 1000" in txt:
+        return "moyen"
+    return "moyen"
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_city(name: str) -> str:
+    """
+    Normalise un nom de ville pour le matching :
+    - minuscules
+    - sans accents
+    - on garde lettres / chiffres / espaces
+    - on compacte les espaces
+    """
+    if not name:
+        return ""
+    # minuscules
+    text = name.lower().strip()
+    # retirer accents
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    # garder lettres/chiffres/espaces
+    text = _NON_ALNUM.sub(" ", text)
+    # compacter les espaces
+    text = _SPACES.sub(" ", text).strip()
+    return text
+
+
+def _arrondissements(city: str, count: int, postal_prefix: str) -> Dict[str, str]:
+    aliases = {}
+    for n in range(1, count + 1):
+        ordinal = "1er" if n == 1 else f"{n}e"
+        for suffix in (str(n), ordinal, f"{n}eme", f"{n}em"):
+            aliases[f"{city} {suffix}"] = city
+        aliases[f"{postal_prefix}{n:03d}"] = city
+    return aliases
+
+
+# Alias (déjà normalisés) → zone canonique. Les villes du gazetteer et les
+# zones du catalogue sont leur propre zone canonique (voir ZONE_ALIASES).
+CITY_ALIASES: Dict[str, str] = {
+    **_arrondissements("paris", 20, "75"),
+    **_arrondissements("lyon", 9, "69"),
+    **_arrondissements("marseille", 16, "13"),
+    "75116": "paris",
+    # Paris et petite couronne
+    "paris la defense": "paris",
+    "la defense": "paris",
+    "courbevoie": "paris",
+    "puteaux": "paris",
+    "nanterre": "paris",
+    "neuilly sur seine": "paris",
+    "neuilly": "paris",
+    "levallois perret": "paris",
+    "boulogne billancourt": "paris",
+    "issy les moulineaux": "paris",
+    "saint denis": "paris",
+    "montreuil": "paris",
+    "vincennes": "paris",
+    # Autres métropoles
+    "villeurbanne": "lyon",
+    "aix en provence": "marseille",
+    "nyc": "new york",
+    "new york city": "new york",
+    "manhattan": "new york",
+    "brooklyn": "new york",
+    "brussels": "bruxelles",
+    "brussel": "bruxelles",
+    "dubai": "dubai",
+}
+
+
+def _zone_aliases() -> Dict[str, str]:
+    aliases = dict(CITY_ALIASES)
+    for zone in list(GAZETTEER) + [normalize_city(s.get("zone", "")) for s in SHOPPERS]:
+        if zone:
+            aliases.setdefault(zone, zone)
+    return aliases
+
+
+# Table complète, construite une fois à l'import : le résultat de zone_id ne
+# dépend pas de ce qui a été chargé avant dans le processus
+ZONE_ALIASES: Dict[str, str] = _zone_aliases()
+
+
+@lru_cache(maxsize=4096)
+def zone_id(name: str) -> str:
+    """
+    Zone canonique d'une ville, résolue en O(1) via ZONE_ALIASES.
+    Si le nom complet n'est pas connu, on essaie ses préfixes de mots
+    ("paris 15eme arrondissement" → "paris", "lyon france" → "lyon").
+    """
+    text = normalize_city(name)
+    if not text:
+        return ""
+    if text in ZONE_ALIASES:
+        return ZONE_ALIASES[text]
+    words = text.split(" ")
+    for k in range(len(words) - 1, 0, -1):
+        prefix = " ".join(words[:k])
+        if prefix in ZONE_ALIASES:
+            return ZONE_ALIASES[prefix]
+    return text
+
+
+# Rayon (km) dans lequel un shopper est considéré « à proximité »
+PROXIMITY_RADIUS_KM = 30.0
+
+# Bonus de proximité par tranche de distance : (distance max en km, points).
+# Hors présentiel, la proximité n'est qu'un plus et plafonne à 1 point.
+PROXIMITY_BANDS = ((10.0, 2), (PROXIMITY_RADIUS_KM, 1))
+
+
+def proximity_points(distance_km: Optional[float]) -> int:
+    """Points de proximité pour une distance client ↔ shopper (None = hors zone)."""
+    if distance_km is None:
+        return 0
+    for limit, points in PROXIMITY_BANDS:
+        if distance_km <= limit:
+            return points
+    return 0
+
+
+def area_distance(client_city: str, shopper_zone: str) -> Optional[float]:
+    """
+    Distance (km) client ↔ shopper entre les coordonnées des deux zones
+    (gazetteer) si elles sont connues ; sinon 0 pour une même zone canonique
+    et None pour deux zones différentes.
+    """
+    client_zone, zone = zone_id(client_city), zone_id(shopper_zone)
+    a, b = coordinates(client_zone), coordinates(zone)
+    if a is not None and b is not None:
+        return haversine_km(a, b)
+    return 0.0 if client_zone == zone else None
+
+
+# ============================================================
+# 2. RÈGLES DE SCORING
+# ============================================================
+
+# Formats acceptés quand le client demande du présentiel
+PRESENTIEL_FORMATS = ["magasin", "domicile", "presentiel", "visio/presentiel"]
+
+# Champs du shopper comparés au texte libre du client
+FREE_TEXT_FIELDS = ["styles", "specialites", "tags"]
+
+
+def free_text_term(item: str) -> str:
+    return item.lower().replace("_", " ")
+
+
+def assemble_score(
+    mode: str,
+    proximity: Optional[int],
+    style_ok: bool,
+    objective_ok: bool,
+    budget_ok: bool,
+    format_ok: bool,
+    free_items: List[str],
+) -> Tuple[int, List[str]]:
+    """
+    Applique les pondérations métier (+2 / +1) à partir des critères déjà évalués.
+    `proximity` est le résultat de proximity_points (0 = hors zone),
+    None si le client n'a pas renseigné de ville.
+    """
+    score = 0
+    reasons: List[str] = []
+
+    if proximity is not None:
+        # Si le client veut absolument du présentiel → la ville devient bloquante
+        if mode == "presentiel":
+            if not proximity:
+                return 0, []  # pas dans la zone, on élimine
+            score += proximity
+            if proximity >= 2:
+                reasons.append("Basé(e) dans ta ville ou tout près (présentiel)")
+            else:
+                reasons.append("Basé(e) à proximité de ta ville (présentiel)")
+        # Si visio ou peu_importe → pas bloquant, mais on donne un bonus si c'est proche
+        elif proximity:
+            score += 1
+            reasons.append("Dans ta zone géographique (utile si un jour tu veux du présentiel)")
+
+    if style_ok:
+        score += 2
+        reasons.append("Style compatible avec ce que tu recherches")
+
+    if objective_ok:
+        score += 2
+        reasons.append("Spécialisé(e) sur ton objectif principal")
+
+    if budget_ok:
+        score += 2
+        reasons.append("Adapté à ton budget vestimentaire")
+
+    if format_ok:
+        score += 1
+        if mode == "visio":
+            reasons.append("Peut te proposer une séance en visio")
+        else:
+            reasons.append("Peut te recevoir en présentiel")
+
+    for item in free_items:
+        score += 1
+        reasons.append(f"Correspond à ton besoin : {item}")
+
+    return score, reasons
+
+
+def match(client: Dict, shopper: Dict) -> Tuple[int, List[str]]:
+    proximity = None
+    if zone_id(client.get("city", "")):
+        proximity = proximity_points(area_distance(client.get("city", ""), shopper.get("zone", "")))
+
+    # Style
+    style_ok = bool(client["style"]) and any(
+        style_item in shopper["styles"] for style_item in client["style"]
+    )
+
+    # Objectif
+    objective_ok = bool(client["objective"]) and any(
+        client["objective"].lower() in spec.lower() for spec in shopper["specialites"]
+    )
+
+    # Budget
+    budget_ok = compute_budget_level(client["budget"]) in shopper["niveau_budget"]
+
+    # Mode
+    format_ok = False
+    if client["mode"] == "visio":
+        format_ok = any("visio" in f for f in shopper["formats"])
+    elif client["mode"] == "presentiel":
+        format_ok = any(f in shopper["formats"] for f in PRESENTIEL_FORMATS)
+
+    # Texte libre
+    free_items: List[str] = []
+    if client["extra_info"]:
+        text = client["extra_info"].lower()
+        for field in FREE_TEXT_FIELDS:
+            for item in shopper[field]:
+                if free_text_term(item) in text:
+                    free_items.append(item)
+                    break
+
+    return assemble_score(
+        client["mode"], proximity, style_ok, objective_ok, budget_ok, format_ok, free_items
+    )
+
+
+# ============================================================
+# 3. ENREGISTREMENTS TYPÉS
+# ============================================================
+
+class Vocabulary:
+    """
+    Codes entiers pour les valeurs d'une modalité (styles, budgets…) :
+    une valeur = un bit, attribué à la première rencontre côté catalogue.
+    """
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[sys.intern(value)] = len(self.codes)
+        return code
+
+    def mask(self, values: Iterable[str]) -> int:
+        """Masque du catalogue (les nouvelles valeurs sont enregistrées)."""
+        mask = 0
+        for value in values:
+            mask |= 1 << self.code(value)
+        return mask
+
+    def lookup(self, values: Iterable[str]) -> int:
+        """Masque côté client : une valeur inconnue du catalogue ne matche rien."""
+        mask = 0
+        for value in values:
+            code = self.codes.get(value)
+            if code is not None:
+                mask |= 1 << code
+        return mask
+
+
+STYLES = Vocabulary(["casual", "chic", "streetwear", "minimal", "bohème", "élégant"])
+BUDGET_LEVELS = Vocabulary(["bas", "moyen", "élevé", "luxe"])
+
+# Capacités de format (un shopper peut cumuler les deux)
+VISIO = 1
+PRESENTIEL = 2
+MODE_REQUIREMENTS = {"visio": VISIO, "presentiel": PRESENTIEL}
+
+
+def _strings(values: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(sys.intern(v) for v in values)
+
+
+@dataclass(frozen=True, slots=True)
+class Shopper:
+    """Shopper du catalogue avec ses modalités pré-encodées en masques de bits."""
+
+    id: int
+    nom: str
+    zone: str
+    note_moyenne: float
+    genre_clients: Tuple[str, ...]
+    specialites: Tuple[str, ...]
+    styles: Tuple[str, ...]
+    formats: Tuple[str, ...]
+    niveau_budget: Tuple[str, ...]
+    tags: Tuple[str, ...]
+    style_mask: int
+    budget_mask: int
+    capabilities: int
+    specialites_lower: Tuple[str, ...]
+    # Par champ de FREE_TEXT_FIELDS : (item d'origine, terme) dans l'ordre du catalogue
+    terms: Tuple[Tuple[Tuple[str, str], ...], ...]
+
+    @classmethod
+    def from_dict(cls, shopper: Dict) -> "Shopper":
+        formats = shopper["formats"]
+        capabilities = 0
+        if any("visio" in f for f in formats):
+            capabilities |= VISIO
+        if any(f in formats for f in PRESENTIEL_FORMATS):
+            capabilities |= PRESENTIEL
+        return cls(
+            id=shopper["id"],
+            nom=shopper.get("nom", ""),
+            zone=sys.intern(shopper.get("zone", "")),
+            note_moyenne=shopper.get("note_moyenne", 0.0),
+            genre_clients=_strings(shopper.get("genre_clients", [])),
+            specialites=_strings(shopper["specialites"]),
+            styles=_strings(shopper["styles"]),
+            formats=_strings(formats),
+            niveau_budget=_strings(shopper["niveau_budget"]),
+            tags=_strings(shopper.get("tags", [])),
+            style_mask=STYLES.mask(shopper["styles"]),
+            budget_mask=BUDGET_LEVELS.mask(shopper["niveau_budget"]),
+            capabilities=capabilities,
+            specialites_lower=_strings(spec.lower() for spec in shopper["specialites"]),
+            terms=tuple(
+                tuple((item, free_text_term(item)) for item in shopper.get(field, []))
+                for field in FREE_TEXT_FIELDS
+            ),
+        )
+
+    def to_dict(self) -> Dict:
+        """Dict au format de SHOPPERS (persistance, prompts)."""
+        return {
+            "id": self.id,
+            "nom": self.nom,
+            "genre_clients": list(self.genre_clients),
+            "specialites": list(self.specialites),
+            "styles": list(self.styles),
+            "zone": self.zone,
+            "formats": list(self.formats),
+            "niveau_budget": list(self.niveau_budget),
+            "tags": list(self.tags),
+            "note_moyenne": self.note_moyenne,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Client:
+    """Profil client du formulaire, avec les critères de matching pré-calculés."""
+
+    nom: str = ""
+    prenom: str = ""
+    gender: str = ""
+    job_sector: str = ""
+    work_env: str = ""
+    style: Tuple[str, ...] = ()
+    size: str = ""
+    budget: str = ""
+    language: str = ""
+    city: str = ""
+    favorite_brand: str = ""
+    service_type: str = ""
+    objective: str = ""
+    life_event: str = "aucun_particulier"
+    needs_confidence: bool = False
+    mode: str = "peu_importe"
+    extra_info: str = ""
+    email: Optional[str] = None
+    # Critères dérivés
+    zone: str = ""
+    style_mask: int = 0
+    budget_mask: int = 0
+    required: int = 0
+    objective_lower: str = ""
+    extra_lower: str = ""
+
+    @classmethod
+    def from_dict(cls, client: Dict) -> "Client":
+        style = tuple(client.get("style") or ())
+        mode = client.get("mode") or "peu_importe"
+        return cls(
+            nom=client.get("nom", ""),
+            prenom=client.get("prenom", ""),
+            gender=client.get("gender", ""),
+            job_sector=client.get("job_sector", ""),
+            work_env=client.get("work_env", ""),
+            style=style,
+            size=client.get("size", ""),
+            budget=client.get("budget", ""),
+            language=client.get("language", ""),
+            city=client.get("city", ""),
+            favorite_brand=client.get("favorite_brand", ""),
+            service_type=client.get("service_type", ""),
+            objective=client.get("objective", ""),
+            life_event=client.get("life_event", "aucun_particulier"),
+            needs_confidence=bool(client.get("needs_confidence", False)),
+            mode=mode,
+            extra_info=client.get("extra_info", ""),
+            email=client.get("email"),
+            zone=zone_id(client.get("city", "")),
+            style_mask=STYLES.lookup(style),
+            budget_mask=BUDGET_LEVELS.lookup([compute_budget_level(client.get("budget", ""))]),
+            required=MODE_REQUIREMENTS.get(mode, 0),
+            objective_lower=(client.get("objective") or "").lower(),
+            extra_lower=(client.get("extra_info") or "").lower(),
+        )
+
+    def to_dict(self) -> Dict:
+        """Dict au format de page_client (persistance, prompts)."""
+        client = {
+            "nom": self.nom,
+            "prenom": self.prenom,
+            "gender": self.gender,
+            "job_sector": self.job_sector,
+            "work_env": self.work_env,
+            "style": list(self.style),
+            "size": self.size,
+            "budget": self.budget,
+            "language": self.language,
+            "city": self.city,
+            "favorite_brand": self.favorite_brand,
+            "service_type": self.service_type,
+            "objective": self.objective,
+            "life_event": self.life_event,
+            "needs_confidence": self.needs_confidence,
+            "mode": self.mode,
+            "extra_info": self.extra_info,
+        }
+        if self.email is not None:
+            client["email"] = self.email
+        return client
+
+
+def match_records(client: Client, shopper: Shopper) -> Tuple[int, List[str]]:
+    """Mêmes règles que match(), en opérations sur les masques pré-calculés."""
+    proximity = None
+    if client.zone:
+        proximity = proximity_points(area_distance(client.city, shopper.zone))
+
+    objective = client.objective_lower
+    objective_ok = bool(objective) and any(objective in spec for spec in shopper.specialites_lower)
+
+    free_items: List[str] = []
+    if client.extra_lower:
+        text = client.extra_lower
+        for field_terms in shopper.terms:
+            for item, term in field_terms:
+                if term in text:
+                    free_items.append(item)
+                    break
+
+    return assemble_score(
+        client.mode,
+        proximity,
+        bool(client.style_mask & shopper.style_mask),
+        objective_ok,
+        bool(client.budget_mask & shopper.budget_mask),
+        bool(client.required & shopper.capabilities),
+        free_items,
+    )
+
+
+# ============================================================
+# 4. INDEX DU CATALOGUE
+# ============================================================
+
+class ShopperIndex:
+    """
+    Index du catalogue construit une seule fois au démarrage :
+    zones canoniques, grille spatiale, index inversés (style, budget,
+    format, spécialité, texte libre) et leurs matrices booléennes.
+    Le scoring d'un client se fait alors en une passe (voir score_all)
+    au lieu de réévaluer chaque dict de SHOPPERS.
+    """
+
+    def __init__(self, shoppers: Iterable[Dict]):
+        self.shoppers: List[Dict] = list(shoppers)
+        self.by_id: Dict[int, Dict] = {s["id"]: s for s in self.shoppers}
+        self.ids: List[int] = [s["id"] for s in self.shoppers]
+        self.position: Dict[int, int] = {sid: i for i, sid in enumerate(self.ids)}
+        # Enregistrements typés, alignés sur self.shoppers (raisons du top k)
+        self.records: List[Shopper] = [Shopper.from_dict(s) for s in self.shoppers]
+
+        self.zones: Dict[int, str] = {}
+        self.by_zone: Dict[str, Set[int]] = defaultdict(set)
+        self.by_style: Dict[str, Set[int]] = defaultdict(set)
+        self.by_budget: Dict[str, Set[int]] = defaultdict(set)
+        self.by_format: Dict[str, Set[int]] = defaultdict(set)
+        self.by_specialite: Dict[str, Set[int]] = defaultdict(set)
+        # (champ, terme) → ids ; termes déjà en minuscules, "_" remplacés
+        self.by_term: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+
+        for s in self.shoppers:
+            sid = s["id"]
+            zone = zone_id(s.get("zone", ""))
+            self.zones[sid] = zone
+            self.by_zone[zone].add(sid)
+            for style in s["styles"]:
+                self.by_style[style].add(sid)
+            for level in s["niveau_budget"]:
+                self.by_budget[level].add(sid)
+            for fmt in s["formats"]:
+                self.by_format[fmt].add(sid)
+            for spec in s["specialites"]:
+                self.by_specialite[spec.lower()].add(sid)
+
+            for field in FREE_TEXT_FIELDS:
+                for item in s[field]:
+                    self.by_term[(field, free_text_term(item))].add(sid)
+
+        # Grille spatiale sur les shoppers dont la zone a des coordonnées
+        self.geo = GeoGrid({
+            sid: coordinates(zone) for sid, zone in self.zones.items()
+            if coordinates(zone) is not None
+        })
+
+        # Automate unique sur tout le vocabulaire texte libre du catalogue
+        self.fields_by_term: Dict[str, List[str]] = defaultdict(list)
+        for field, term in self.by_term:
+            self.fields_by_term[term].append(field)
+        self.term_automaton = AhoCorasick(self.fields_by_term)
+
+        # Matrices booléennes (shoppers × modalités) pour le scoring vectorisé
+        self.id_array = np.array(self.ids)
+        self.notes = np.array([s.get("note_moyenne", 0.0) for s in self.shoppers], dtype=float)
+        self.style_cols, self.style_matrix = self._incidence(self.by_style)
+        self.budget_cols, self.budget_matrix = self._incidence(self.by_budget)
+        self.format_cols, self.format_matrix = self._incidence(self.by_format)
+        self.specialite_cols, self.specialite_matrix = self._incidence(self.by_specialite)
+        self.term_cols, self.term_matrix = self._incidence(self.by_term)
+
+    def __len__(self) -> int:
+        return len(self.shoppers)
+
+    def _incidence(self, inverted: Dict[Hashable, Set[int]]) -> Tuple[Dict[Hashable, int], np.ndarray]:
+        cols = {key: j for j, key in enumerate(inverted)}
+        matrix = np.zeros((len(self.ids), len(cols)), dtype=bool)
+        for key, j in cols.items():
+            for sid in inverted[key]:
+                matrix[self.position[sid], j] = True
+        return cols, matrix
+
+    # ---------- recherches élémentaires ----------
+
+    def area_distances(self, client_city: str) -> Dict[int, float]:
+        """Shoppers à proximité → distance (km) : requête de rayon si la ville est géolocalisée."""
+        zone = zone_id(client_city)
+        center = coordinates(zone)
+        if center is None:
+            return {sid: 0.0 for sid in self.by_zone.get(zone, ())}
+        return self.geo.within(center, PROXIMITY_RADIUS_KM)
+
+    def proximity(self, client_city: str) -> np.ndarray:
+        """Points de proximité (PROXIMITY_BANDS) de chaque shopper, alignés sur self.shoppers."""
+        points = np.zeros(len(self.ids), dtype=np.int64)
+        for sid, distance in self.area_distances(client_city).items():
+            points[self.position[sid]] = proximity_points(distance)
+        return points
+
+    def area_positions(self, client_city: str) -> np.ndarray:
+        return np.flatnonzero(self.proximity(client_city))
+
+    def free_text_terms(self, extra_info: str) -> Set[Tuple[str, str]]:
+        """(champ, terme) du catalogue présents dans le texte, en un seul passage."""
+        return {
+            (field, term)
+            for term in self.term_automaton.find(extra_info.lower())
+            for field in self.fields_by_term[term]
+        }
+
+
+# ============================================================
+# 5. SCORING VECTORISÉ
+# ============================================================
+
+def _any_of(matrix: np.ndarray, cols: List[int]) -> np.ndarray:
+    if not cols:
+        return np.zeros(matrix.shape[0], dtype=bool)
+    return matrix[:, cols].any(axis=1)
+
+
+def score_all(client: Dict, index: ShopperIndex) -> np.ndarray:
+    """
+    Score de chaque shopper du catalogue en une seule passe NumPy,
+    aligné sur index.shoppers. Mêmes pondérations que match() ;
+    les raisons ne sont pas calculées ici (voir match_reasons).
+    En présentiel, seuls les shoppers renvoyés par la requête de rayon sont évalués.
+    """
+    mode = client["mode"]
+    scores = np.zeros(len(index), dtype=np.int64)
+
+    rows = slice(None)
+    proximity = None
+    if zone_id(client.get("city", "")):
+        points = index.proximity(client["city"])
+        if mode == "presentiel":
+            # Hors zone → éliminé : on ne score que les shoppers proches
+            rows = np.flatnonzero(points)
+            proximity = points[rows]
+        else:
+            proximity = np.minimum(points, 1)
+
+    sub = np.zeros(len(scores[rows]), dtype=np.int64)
+    if proximity is not None:
+        sub += proximity
+
+    if client["style"]:
+        cols = [index.style_cols[s] for s in client["style"] if s in index.style_cols]
+        sub += 2 * _any_of(index.style_matrix[rows], cols)
+
+    if client["objective"]:
+        obj = client["objective"].lower()
+        cols = [j for spec, j in index.specialite_cols.items() if obj in spec]
+        sub += 2 * _any_of(index.specialite_matrix[rows], cols)
+
+    level = compute_budget_level(client["budget"])
+    if level in index.budget_cols:
+        sub += 2 * index.budget_matrix[rows, index.budget_cols[level]]
+
+    if mode == "visio":
+        cols = [j for fmt, j in index.format_cols.items() if "visio" in fmt]
+        sub += _any_of(index.format_matrix[rows], cols)
+    elif mode == "presentiel":
+        cols = [index.format_cols[f] for f in PRESENTIEL_FORMATS if f in index.format_cols]
+        sub += _any_of(index.format_matrix[rows], cols)
+
+    if client["extra_info"]:
+        found = index.free_text_terms(client["extra_info"])
+        for field in FREE_TEXT_FIELDS:
+            cols = [index.term_cols[key] for key in found if key[0] == field]
+            sub += _any_of(index.term_matrix[rows], cols)
+
+    scores[rows] = sub
+    return scores
+
+
+def match_reasons(client: Client, shopper: Shopper) -> List[str]:
+    """Raisons affichées, calculées uniquement pour les shoppers montrés au client."""
+    return match_records(client, shopper)[1]
+
+
+# Raison ajoutée quand le bonus sémantique (mode hybride) compte
+SEMANTIC_REASON = "Profil proche de ce que tu décris"
+
+
+def top_matches(
+    client: Dict,
+    index: ShopperIndex,
+    k: int = 3,
+    semantic=None,
+) -> List[Tuple[Dict, int, List[str]]]:
+    """
+    Les k meilleurs shoppers (score > 0) avec leurs raisons, sans trier tout le catalogue.
+    Départage déterministe : score, puis note_moyenne décroissants, puis id croissant.
+    `semantic` (semantic.HybridScorer) ajoute au score métier un bonus de similarité.
+    """
+    scores = score_all(client, index)
+    bonus = None
+    if semantic is not None:
+        bonus = semantic.bonus(client)
+        scores = scores + bonus
+    candidates = np.flatnonzero(scores > 0)
+    if k <= 0 or not len(candidates):
+        return []
+
+    if len(candidates) > k:
+        # Seuil = k-ième meilleur score ; on garde tous les ex aequo au seuil
+        kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+        candidates = candidates[scores[candidates] >= kth]
+
+    order = np.lexsort((
+        index.id_array[candidates],
+        -index.notes[candidates],
+        -scores[candidates],
+    ))
+    top = candidates[order[:k]]
+
+    record = Client.from_dict(client)
+    results = []
+    for i in top:
+        reasons = match_reasons(record, index.records[i])
+        if bonus is not None and bonus[i] > 0:
+            reasons.append(SEMANTIC_REASON)
+        results.append((index.shoppers[i], int(round(scores[i])), reasons))
+    return results
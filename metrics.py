@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+# ============================================================
+# INSTRUMENTATION (SPANS, COMPTEURS, EXPORT)
+# ============================================================
+
+# Durées conservées par span pour les quantiles (fenêtre glissante)
+WINDOW = 2048
+
+
+class Metrics:
+    """
+    Registre en mémoire, partagé par le processus :
+    - spans : durées des étapes (match, appels Groq, lecture/écriture…) ;
+    - compteurs : tokens consommés, erreurs, etc.
+    Optionnellement, chaque span est aussi ajouté à une trace JSONL locale.
+    """
+
+    def __init__(self, trace_path: Optional[str] = None, window: int = WINDOW):
+        self.trace_path = trace_path
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._count: Dict[str, int] = defaultdict(int)
+        self._sum: Dict[str, float] = defaultdict(float)
+        self._counters: Dict[str, float] = defaultdict(float)
+
+    def observe(self, name: str, seconds: float, **attrs):
+        with self._lock:
+            self._durations[name].append(seconds)
+            self._count[name] += 1
+            self._sum[name] += seconds
+            if self.trace_path:
+                record = {"ts": time.time(), "span": name, "ms": round(seconds * 1000, 3), **attrs}
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.perf_counter()
+        try:
+            yield attrs  # l'appelant peut compléter les attributs (tokens, statut…)
+        finally:
+            self.observe(name, time.perf_counter() - start, **attrs)
+
+    def timed(self, name: str) -> Callable:
+        """Décorateur : un span par appel."""
+        def decorator(fn: Callable) -> Callable:
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def timed_iter(self, name: str, chunks: Iterator[str]) -> Iterator[str]:
+        """Span couvrant la consommation complète d'un flux (réponse en streaming)."""
+        with self.span(name):
+            yield from chunks
+
+    def summary(self) -> List[Dict]:
+        """Par span : nombre d'appels, moyenne, p50 et p99 (ms) sur la fenêtre récente."""
+        with self._lock:
+            snapshot = {name: sorted(d) for name, d in self._durations.items()}
+            counts = dict(self._count)
+            sums = dict(self._sum)
+        rows = []
+        for name in sorted(snapshot):
+            values = snapshot[name]
+            if not values:
+                continue
+            rows.append({
+                "span": name,
+                "count": counts[name],
+                "mean_ms": sums[name] / counts[name] * 1000,
+                "p50_ms": _quantile(values, 0.50) * 1000,
+                "p99_ms": _quantile(values, 0.99) * 1000,
+            })
+        return rows
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def prometheus(self) -> str:
+        """Export au format texte Prometheus (summary par span + compteurs)."""
+        lines = [
+            "# HELP pershop_span_seconds Durée des étapes instrumentées.",
+            "# TYPE pershop_span_seconds summary",
+        ]
+        for row in self.summary():
+            label = f'span="{row["span"]}"'
+            lines.append(f'pershop_span_seconds{{{label},quantile="0.5"}} {row["p50_ms"] / 1000:.6f}')
+            lines.append(f'pershop_span_seconds{{{label},quantile="0.99"}} {row["p99_ms"] / 1000:.6f}')
+            lines.append(f"pershop_span_seconds_sum{{{label}}} {row['mean_ms'] * row['count'] / 1000:.6f}")
+            lines.append(f"pershop_span_seconds_count{{{label}}} {row['count']}")
+        for name, value in sorted(self.counters().items()):
+            metric = f"pershop_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    """Quantile par rang le plus proche (valeurs déjà triées)."""
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def metrics_from_env() -> Metrics:
+    """METRICS_TRACE_PATH=traces.jsonl pour tracer chaque span dans un fichier local."""
+    return Metrics(trace_path=os.getenv("METRICS_TRACE_PATH") or None)
+
+
+# Registre unique du processus (app Streamlit, API, worker)
+METRICS = metrics_from_env()
@@ -0,0 +1,169 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from matching import ShopperIndex, score_all
+
+# ============================================================
+# AFFECTATION GLOBALE SOUS CONTRAINTE DE CAPACITÉ
+# ============================================================
+
+def score_matrix(clients: List[Dict], index: ShopperIndex) -> np.ndarray:
+    """Matrice clients × shoppers des scores de match (alignée sur index.shoppers)."""
+    if not clients:
+        return np.zeros((0, len(index)), dtype=np.int64)
+    return np.vstack([score_all(client, index) for client in clients])
+
+
+def capacity_vector(index: ShopperIndex, capacity: Union[int, Dict[int, int]]) -> np.ndarray:
+    """Capacité par shopper : entier commun, ou dict shopper_id → capacité (0 si absent)."""
+    if isinstance(capacity, dict):
+        return np.array([max(capacity.get(sid, 0), 0) for sid in index.ids], dtype=np.int64)
+    return np.full(len(index), max(capacity, 0), dtype=np.int64)
+
+
+class _Assignment:
+    """
+    État d'une affectation optimale, enrichie client par client
+    (plus courts chemins successifs sur le graphe des shoppers).
+
+    Pour chaque shopper `a` on maintient :
+    - `move[a, b]` : coût minimal pour déplacer un de ses clients vers `b`
+      (score perdu = S[i, a] - S[i, b]), et le client correspondant ;
+    - `eject[a]` : coût minimal pour libérer une place en désaffectant un client.
+    Libérer une place en `j` coûte alors d[j] = plus court chemin de `j`
+    vers un shopper non plein (ou vers une désaffectation).
+    """
+
+    def __init__(self, scores: np.ndarray, caps: np.ndarray):
+        self.scores = scores
+        n, m = scores.shape
+        self.allowed = (scores > 0) & (caps > 0)[None, :]
+        self.gain = np.where(self.allowed, scores, -np.inf).astype(float)
+        self.caps = caps
+        self.load = np.zeros(m, dtype=np.int64)
+        self.members: List[List[int]] = [[] for _ in range(m)]
+        self.owner = np.full(n, -1, dtype=np.int64)
+
+        self.move = np.full((m, m), np.inf)
+        self.move_client = np.zeros((m, m), dtype=np.int64)
+        self.eject = np.full(m, np.inf)
+        self.eject_client = np.zeros(m, dtype=np.int64)
+        self._paths: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def _refresh(self, a: int):
+        self._paths = None
+        ids = np.array(self.members[a], dtype=np.int64)
+        if not len(ids):
+            self.move[a] = np.inf
+            self.eject[a] = np.inf
+            return
+        here = self.scores[ids, a].astype(float)
+        cost = here[:, None] - self.gain[ids]  # inf si le shopper cible est incompatible
+        best = cost.argmin(axis=0)
+        self.move[a] = cost[best, np.arange(cost.shape[1])]
+        self.move_client[a] = ids[best]
+        self.move[a, a] = np.inf
+        k = here.argmin()
+        self.eject[a] = here[k]
+        self.eject_client[a] = ids[k]
+
+    def _distances(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Coût pour libérer une place chez chaque shopper, et shopper suivant sur le chemin."""
+        if self._paths is not None:
+            return self._paths  # inchangé tant qu'aucun client n'a bougé
+        m = len(self.caps)
+        d = np.where(self.load < self.caps, 0.0, self.eject)
+        nxt = np.full(m, -1, dtype=np.int64)
+        rows = np.arange(m)
+        # Bellman-Ford : seuls les shoppers dont d a baissé au tour précédent sont relâchés
+        changed = rows
+        while len(changed):
+            through = self.move[:, changed] + d[changed]
+            k = through.argmin(axis=1)
+            val = through[rows, k]
+            better = val < d - 1e-9
+            d[better] = val[better]
+            nxt[better] = changed[k[better]]
+            changed = np.flatnonzero(better)
+        self._paths = d, nxt
+        return d, nxt
+
+    def _place(self, i: int, j: int):
+        self.members[j].append(i)
+        self.owner[i] = j
+
+    def _remove(self, i: int, j: int):
+        self.members[j].remove(i)
+        self.owner[i] = -1
+
+    def add(self, i: int):
+        row = self.gain[i]
+        best = row.max()
+        if best <= 0:
+            return
+
+        # Cas simple : un shopper de score maximal a encore de la place
+        free_best = np.flatnonzero((row == best) & (self.load < self.caps))
+        if len(free_best):
+            # À score égal, le shopper le moins chargé
+            j = int(free_best[np.argmin(self.load[free_best] / self.caps[free_best])])
+            self._place(i, j)
+            self.load[j] += 1
+            self._refresh(j)
+            return
+
+        d, nxt = self._distances()
+        net = row - d
+        j = int(net.argmax())
+        if net[j] <= 0:
+            return  # le client reste sans shopper
+
+        # Chaîne de réaffectations j → nxt[j] → … jusqu'à une place libre ou une désaffectation
+        self._place(i, j)
+        touched = [j]
+        cur = j
+        while nxt[cur] >= 0:
+            b = int(nxt[cur])
+            c = int(self.move_client[cur, b])
+            self._remove(c, cur)
+            self._place(c, b)
+            cur = b
+            touched.append(cur)
+        if self.load[cur] < self.caps[cur]:
+            self.load[cur] += 1
+        else:
+            self._remove(int(self.eject_client[cur]), cur)
+        for a in touched:
+            self._refresh(a)
+
+
+def optimize_assignments(
+    clients: List[Dict],
+    index: ShopperIndex,
+    capacity: Union[int, Dict[int, int]],
+) -> List[Tuple[Dict, Optional[Dict], int]]:
+    """
+    Affecte une fenêtre de clients en maximisant la somme des scores de match,
+    sans dépasser la capacité de chaque shopper. Un client reste sans shopper
+    si aucun shopper compatible ne peut le prendre sans dégrader le total.
+
+    Flot de coût minimal par plus courts chemins successifs : chaque client
+    entre par le chemin de réaffectations le plus rentable, calculé sur le
+    graphe des shoppers (m nœuds) et non sur celui des clients.
+
+    Renvoie, dans l'ordre des clients : (client, shopper ou None, score).
+    """
+    scores = score_matrix(clients, index)
+    state = _Assignment(scores, capacity_vector(index, capacity))
+    for i in range(len(clients)):
+        state.add(i)
+
+    result: List[Tuple[Dict, Optional[Dict], int]] = []
+    for i, client in enumerate(clients):
+        j = int(state.owner[i])
+        if j < 0:
+            result.append((client, None, 0))
+        else:
+            result.append((client, index.shoppers[j], int(scores[i, j])))
+    return result
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+# ============================================================
+# FILE D'ATTENTE DES PRÉ-BRIEFS (SQLITE)
+# ============================================================
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prebrief_jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    assignment_id TEXT UNIQUE NOT NULL,
+    assignment TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    not_before REAL NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prebrief_jobs_status ON prebrief_jobs (status, seq);
+"""
+
+
+class PrebriefQueue:
+    """
+    File de jobs de génération de pré-brief, partagée entre l'app Streamlit
+    (qui enfile) et `prebrief_worker.py` (qui dépile).
+    Un job resté `running` plus de `lease_seconds` (worker tué) est repris,
+    ou passe en échec s'il a épuisé ses `max_attempts` tentatives.
+    Un job en échec est retenté après `retry_seconds`, doublés à chaque tentative.
+    """
+
+    def __init__(
+        self,
+        path: str = "prebrief_jobs.db",
+        max_attempts: int = 3,
+        lease_seconds: float = 300,
+        retry_seconds: float = 30,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_seconds = retry_seconds
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(prebrief_jobs)")}
+            if "not_before" not in columns:  # file créée par une version antérieure
+                conn.execute("ALTER TABLE prebrief_jobs ADD COLUMN not_before REAL NOT NULL DEFAULT 0")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, assignment: Dict):
+        self.enqueue_many([assignment])
+
+    def enqueue_many(self, assignments: Iterable[Dict]):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO prebrief_jobs (assignment_id, assignment, created, updated) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (a["id"], json.dumps(a, ensure_ascii=False), now, now)
+                    for a in assignments
+                ),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim(self) -> Optional[Dict]:
+        """Réserve le plus ancien job en attente et renvoie son assignation (ou None)."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Baux expirés : la tentative abandonnée compte (attempts est incrémenté
+            # à chaque réservation) ; au-delà de max_attempts, le job passe en échec
+            expired = now - self.lease_seconds
+            conn.execute(
+                "UPDATE prebrief_jobs SET status = ?, last_error = ?, updated = ? "
+                "WHERE status = ? AND updated < ? AND attempts >= ?",
+                (FAILED, "bail expiré", now, RUNNING, expired, self.max_attempts),
+            )
+            conn.execute(
+                "UPDATE prebrief_jobs SET status = ?, last_error = ?, updated = ? "
+                "WHERE status = ? AND updated < ?",
+                (PENDING, "bail expiré", now, RUNNING, expired),
+            )
+            row = conn.execute(
+                "SELECT seq, assignment FROM prebrief_jobs WHERE status = ? AND not_before <= ? "
+                "ORDER BY seq LIMIT 1",
+                (PENDING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE prebrief_jobs SET status = ?, attempts = attempts + 1, updated = ? WHERE seq = ?",
+                (RUNNING, now, row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return json.loads(row[1])
+
+    def complete(self, assignment_id: str):
+        # Le pré-brief est dans le store : la copie de l'assignation ne sert plus
+        self._connect().execute(
+            "UPDATE prebrief_jobs SET status = ?, assignment = '', last_error = NULL, updated = ? "
+            "WHERE assignment_id = ?",
+            (DONE, time.time(), assignment_id),
+        )
+
+    def purge(self, older_than: float = 86400) -> int:
+        """Supprime les jobs terminés depuis plus de `older_than` secondes ; renvoie leur nombre."""
+        cur = self._connect().execute(
+            "DELETE FROM prebrief_jobs WHERE status = ? AND updated < ?", (DONE, time.time() - older_than)
+        )
+        return cur.rowcount
+
+    def fail(self, assignment_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Enregistre l'échec ; renvoie True si le job sera retenté.
+        `retry=False` : échec définitif (l'appelant a déjà épuisé ses propres tentatives).
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT attempts FROM prebrief_jobs WHERE assignment_id = ?", (assignment_id,)
+        ).fetchone()
+        retry = retry and row is not None and row[0] < self.max_attempts
+        now = time.time()
+        # Backoff exponentiel : claim ignore le job jusqu'à not_before
+        not_before = now + self.retry_seconds * 2 ** max(row[0] - 1, 0) if retry else 0
+        conn.execute(
+            "UPDATE prebrief_jobs SET status = ?, last_error = ?, updated = ?, not_before = ? "
+            "WHERE assignment_id = ?",
+            (PENDING if retry else FAILED, error, now, not_before, assignment_id),
+        )
+        return retry
+
+    def pending_count(self) -> int:
+        """Jobs en attente, via idx_prebrief_jobs_status (appelé à chaque soumission)."""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM prebrief_jobs WHERE status = ?", (PENDING,)
+        ).fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connect().execute(
+            "SELECT status, COUNT(*) FROM prebrief_jobs GROUP BY status"
+        )
+        return dict(rows.fetchall())
+
+
+def queue_from_env() -> PrebriefQueue:
+    return PrebriefQueue(os.getenv("PREBRIEF_QUEUE_PATH", "prebrief_jobs.db"))
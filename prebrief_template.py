@@ -0,0 +1,119 @@
+import os
+from typing import Dict, List, Optional
+
+from matching import compute_budget_level, match
+
+# ============================================================
+# PRÉ-BRIEF DÉTERMINISTE (SANS LLM)
+# ============================================================
+
+# Statut d'une assignation dont le pré-brief vient du gabarit local
+TEMPLATE_STATUS = "template"
+
+
+def fast_mode() -> bool:
+    """PREBRIEF_MODE=template : pré-briefs locaux uniquement (délestage, Groq hors quota)."""
+    return os.getenv("PREBRIEF_MODE", "llm") == "template"
+
+
+def shed_prebrief(queue) -> bool:
+    """
+    Vrai si le pré-brief doit être rédigé localement plutôt que confié au worker :
+    mode rapide, ou plus de PREBRIEF_MAX_BACKLOG jobs en attente (0 = sans limite).
+    """
+    if fast_mode():
+        return True
+    max_backlog = int(os.getenv("PREBRIEF_MAX_BACKLOG", 0))
+    return max_backlog > 0 and queue.pending_count() >= max_backlog
+
+
+BUDGET_HINTS = {
+    "bas": "enseignes accessibles, seconde main, pièces basiques à fort usage",
+    "moyen": "enseignes milieu de gamme, quelques pièces fortes à investir",
+    "élevé": "créateurs et marques premium, pièces de qualité durables",
+}
+
+LIFE_EVENT_NOTES = {
+    "nouveau_job": "nouveau poste : viser une garde-robe crédible dès les premières semaines",
+    "reconversion": "reconversion : aider à trouver une image alignée avec le nouveau métier",
+    "grossesse/post-partum": "corps en changement : privilégier confort et pièces évolutives",
+    "séparation": "période sensible : séance bienveillante, sans pression",
+    "burnout/épuisement": "énergie limitée : séance courte, peu de choix à la fois",
+}
+
+SESSION_STEPS = {
+    "visio": "échange sur le besoin, revue du dressing en caméra, sélection en ligne commentée, récapitulatif écrit",
+    "presentiel": "échange sur le besoin, essayages en boutique ou à domicile, ajustements, récapitulatif des pièces",
+}
+DEFAULT_STEPS = "échange sur le besoin, choix du format, sélection de pièces, récapitulatif et suivi"
+
+
+def _text(value: str) -> str:
+    return value.replace("_", " ") if value else ""
+
+
+def _items(values: List[str]) -> str:
+    return ", ".join(v.replace("_", " ").lstrip("#") for v in values)
+
+
+def template_prebrief(client: Dict, shopper: Dict, reasons: Optional[List[str]] = None) -> str:
+    """
+    Pré-brief Markdown à la structure de generate_prebrief, rempli à partir
+    des champs du client, du profil du shopper et des raisons du match.
+    Sert de repli quand Groq est indisponible et de mode rapide en cas de charge.
+    """
+    if reasons is None:
+        reasons = match(client, shopper)[1]
+    prenom = client.get("prenom") or "le client"
+    level = compute_budget_level(client.get("budget", ""))
+    mode = client.get("mode", "peu_importe")
+    life_event = client.get("life_event", "aucun_particulier")
+
+    context = [
+        _text(client.get("job_sector", "")),
+        client.get("work_env", ""),
+        _text(life_event) if life_event != "aucun_particulier" else "",
+    ]
+
+    lines = [
+        f"**Pré-brief pour la séance de personal shopping avec {prenom}**",
+        "",
+        "### 1. Résumé du client",
+        f"* **Style** : {_items(client.get('style') or []) or 'à explorer ensemble'}",
+        f"* **Budget** : {client.get('budget') or 'non précisé'} (niveau {level})",
+        f"* **Objectif** : {_text(client.get('objective', '')) or 'non précisé'}",
+        f"* **Contexte** : {' – '.join(c for c in context if c) or 'non précisé'}",
+        "",
+        "### 2. Points d'attention",
+    ]
+    if client.get("needs_confidence"):
+        lines.append("* **Confiance en soi** : à travailler en priorité, valoriser chaque essai réussi")
+    if life_event in LIFE_EVENT_NOTES:
+        lines.append(f"* **Moment de vie** : {LIFE_EVENT_NOTES[life_event]}")
+    if client.get("size"):
+        lines.append(f"* **Taille / morphologie** : {client['size']}")
+    if client.get("extra_info"):
+        lines.append(f"* **Ce que le client précise** : {' '.join(client['extra_info'].split())}")
+    if lines[-1] == "### 2. Points d'attention":
+        lines.append("* **Sensibilités** : aucune indiquée, à faire préciser en début de séance")
+
+    lines += [
+        "",
+        "### 3. Pistes de préparation",
+        f"* **Expertises à mobiliser** : {_items(shopper.get('specialites', []))}",
+        f"* **Univers** : {_items(shopper.get('styles', []) + shopper.get('tags', []))}",
+        f"* **Où chercher** : {BUDGET_HINTS.get(level, BUDGET_HINTS['moyen'])}",
+    ]
+    if client.get("favorite_brand"):
+        lines.append(f"* **Marques appréciées** : {client['favorite_brand']}")
+
+    lines += [
+        "",
+        "### 4. Recommandations de déroulé de séance",
+        f"* **Format** : {_text(mode) if mode != 'peu_importe' else 'au choix'} "
+        f"({_items(shopper.get('formats', []))} proposés)",
+        f"* **Étapes** : {SESSION_STEPS.get(mode, DEFAULT_STEPS)}",
+    ]
+    if reasons:
+        lines.append(f"* **Atouts du match** : {' ; '.join(reasons)}")
+    return "\n".join(lines)
@@ -0,0 +1,164 @@
+"""
+Worker local qui génère les pré-briefs en attente.
+
+    python prebrief_worker.py                    # tourne en continu
+    python prebrief_worker.py --once             # vide la file puis s'arrête
+    python prebrief_worker.py --concurrency 8    # passerelle Groq asynchrone
+"""
+import time
+import asyncio
+import argparse
+from typing import Dict, Optional, Set
+
+from shoppers_data import SHOPPERS
+from storage import AssignmentStore, store_from_env
+from prebrief_queue import PrebriefQueue, queue_from_env
+from llm import GROQ_ENABLED, LLM_ERROR_MESSAGE, agenerate_prebrief, generate_prebrief
+from prebrief_template import TEMPLATE_STATUS, fast_mode, template_prebrief
+from llm_gateway import GroqGateway, LLMGatewayError, gateway_from_env
+
+SHOPPERS_BY_ID: Dict[int, Dict] = {s["id"]: s for s in SHOPPERS}
+
+
+def _failed(
+    assignment: Dict, store: AssignmentStore, queue: PrebriefQueue, error: Exception, retry: bool = True
+):
+    print(f"Pré-brief {assignment['id']} en échec :", repr(error))
+    if queue.fail(assignment["id"], repr(error), retry):
+        return
+    # Tentatives épuisées : le shopper reçoit quand même un pré-brief exploitable
+    shopper = SHOPPERS_BY_ID.get(assignment["shopper_id"])
+    if shopper is None:
+        store.update({**assignment, "prebrief": LLM_ERROR_MESSAGE, "prebrief_status": "failed"})
+        return
+    prebrief = template_prebrief(assignment["client"], shopper)
+    store.update({**assignment, "prebrief": prebrief, "prebrief_status": TEMPLATE_STATUS})
+
+
+def _done(
+    assignment: Dict, store: AssignmentStore, queue: PrebriefQueue, prebrief: str, status: str = "ready"
+):
+    store.update({**assignment, "prebrief": prebrief, "prebrief_status": status})
+    queue.complete(assignment["id"])
+
+
+def _template_job(assignment: Dict, store: AssignmentStore, queue: PrebriefQueue) -> bool:
+    """Mode rapide ou Groq absent : pré-brief local immédiat. Renvoie True si traité."""
+    shopper = SHOPPERS_BY_ID.get(assignment["shopper_id"])
+    if shopper is None:
+        return False
+    _done(assignment, store, queue, template_prebrief(assignment["client"], shopper), TEMPLATE_STATUS)
+    return True
+
+
+def process_job(assignment: Dict, store: AssignmentStore, queue: PrebriefQueue):
+    if (fast_mode() or not GROQ_ENABLED) and _template_job(assignment, store, queue):
+        return
+    try:
+        shopper = SHOPPERS_BY_ID[assignment["shopper_id"]]
+        prebrief = generate_prebrief(assignment["client"], shopper)
+        if prebrief == LLM_ERROR_MESSAGE:
+            raise RuntimeError(prebrief)
+    except Exception as e:
+        _failed(assignment, store, queue, e)
+        return
+    _done(assignment, store, queue, prebrief)
+
+
+async def process_job_async(
+    assignment: Dict, store: AssignmentStore, queue: PrebriefQueue, gateway: Optional[GroqGateway]
+):
+    if (fast_mode() or gateway is None) and _template_job(assignment, store, queue):
+        return
+    try:
+        shopper = SHOPPERS_BY_ID[assignment["shopper_id"]]
+        prebrief = await agenerate_prebrief(assignment["client"], shopper, gateway)
+    except LLMGatewayError as e:
+        # Retries et backoff déjà faits par la passerelle : pas de nouveau passage dans la file
+        _failed(assignment, store, queue, e, retry=False)
+        return
+    except Exception as e:
+        _failed(assignment, store, queue, e)
+        return
+    _done(assignment, store, queue, prebrief)
+
+
+# Ménage des jobs terminés, au plus une fois par intervalle, quand la file est vide
+PURGE_INTERVAL_SECONDS = 300
+
+
+def _purge_if_due(queue: PrebriefQueue, next_purge: float) -> float:
+    if time.monotonic() < next_purge:
+        return next_purge
+    queue.purge()
+    return time.monotonic() + PURGE_INTERVAL_SECONDS
+
+
+def run(store: AssignmentStore, queue: PrebriefQueue, once: bool = False, poll_seconds: float = 1.0):
+    next_purge = 0.0
+    while True:
+        assignment = queue.claim()
+        if assignment is None:
+            next_purge = _purge_if_due(queue, next_purge)
+            if once:
+                return
+            time.sleep(poll_seconds)
+            continue
+        process_job(assignment, store, queue)
+
+
+async def run_async(
+    store: AssignmentStore,
+    queue: PrebriefQueue,
+    gateway: Optional[GroqGateway],
+    concurrency: int = 8,
+    once: bool = False,
+    poll_seconds: float = 1.0,
+):
+    """Comme run, avec jusqu'à `concurrency` pré-briefs générés en parallèle."""
+    in_flight: Set[asyncio.Task] = set()
+    next_purge = 0.0
+    while True:
+        while len(in_flight) < concurrency:
+            assignment = queue.claim()
+            if assignment is None:
+                break
+            in_flight.add(asyncio.create_task(process_job_async(assignment, store, queue, gateway)))
+
+        if in_flight:
+            _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        else:
+            next_purge = _purge_if_due(queue, next_purge)
+            if once:
+                return
+            await asyncio.sleep(poll_seconds)
+
+
+async def _serve(concurrency: int, once: bool, poll_seconds: float):
+    gateway = gateway_from_env()
+    try:
+        await run_async(store_from_env(), queue_from_env(), gateway, concurrency, once, poll_seconds)
+    finally:
+        if gateway is not None:
+            await gateway.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère les pré-briefs en attente.")
+    parser.add_argument("--once", action="store_true", help="vider la file puis s'arrêter")
+    parser.add_argument("--poll", type=float, default=1.0, help="intervalle de polling (s)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="pré-briefs en parallèle via la passerelle asynchrone (0 : mode séquentiel)",
+    )
+    args = parser.parse_args()
+    if args.concurrency > 0:
+        asyncio.run(_serve(args.concurrency, args.once, args.poll))
+    else:
+        run(store_from_env(), queue_from_env(), once=args.once, poll_seconds=args.poll)
+
+
+if __name__ == "__main__":
+    main()
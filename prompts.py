@@ -0,0 +1,122 @@
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+# ============================================================
+# 1. SÉRIALISATION COMPACTE DES PROFILS
+# ============================================================
+
+# (clé, libellé) dans l'ordre du prompt ; nom, email, id et note ne servent pas au modèle
+CLIENT_FIELDS: List[Tuple[str, str]] = [
+    ("prenom", "prénom"),
+    ("gender", "genre"),
+    ("city", "ville"),
+    ("language", "langue"),
+    ("size", "taille"),
+    ("style", "style"),
+    ("budget", "budget"),
+    ("job_sector", "secteur"),
+    ("work_env", "tenue au travail"),
+    ("service_type", "accompagnement"),
+    ("objective", "objectif"),
+    ("life_event", "moment de vie"),
+    ("needs_confidence", "confiance en soi à travailler"),
+    ("mode", "format"),
+    ("favorite_brand", "marques"),
+    ("extra_info", "précisions"),
+]
+
+SHOPPER_FIELDS: List[Tuple[str, str]] = [
+    ("nom", "nom"),
+    ("zone", "zone"),
+    ("styles", "styles"),
+    ("specialites", "spécialités"),
+    ("formats", "formats"),
+    ("niveau_budget", "budgets"),
+    ("genre_clients", "clientèle"),
+    ("tags", "tags"),
+]
+
+# Valeurs par défaut du formulaire : aucune information pour le modèle
+UNINFORMATIVE = {"", "aucun_particulier", "peu_importe"}
+
+
+def _value(value) -> str:
+    if isinstance(value, bool):
+        return "oui" if value else ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v).replace("_", " ") for v in value if v)
+    text = " ".join(str(value).split())
+    return "" if text in UNINFORMATIVE else text.replace("_", " ")
+
+
+def compact(record: Dict, fields: List[Tuple[str, str]]) -> str:
+    """Une ligne `libellé: valeur` par champ renseigné."""
+    lines = []
+    for key, label in fields:
+        value = _value(record.get(key, ""))
+        if value:
+            lines.append(f"{label}: {value}")
+    return "\n".join(lines)
+
+
+# ============================================================
+# 2. COMPTAGE DE TOKENS (ESTIMATION HORS LIGNE)
+# ============================================================
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimation du nombre de tokens (tokenizer BPE type Llama) :
+    un token par signe de ponctuation, un par tranche de 4 caractères de mot.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _PIECES.findall(text))
+
+
+# ============================================================
+# 3. PROMPTS
+# ============================================================
+
+class Prompt(NamedTuple):
+    system: str
+    user: str
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.system) + count_tokens(self.user)
+
+
+BASE_SYSTEM = "Tu es un expert en mode et personal shopping."
+
+# Instructions fixes : message système identique d'un appel à l'autre
+SUMMARY_SYSTEM = BASE_SYSTEM + """
+On te donne le profil d'un client et celui du personal shopper qui lui est proposé.
+Explique en 3 à 4 phrases maximum, en français, pourquoi ce personal shopper est bien adapté à ce client.
+Parle au client à la deuxième personne ("tu"). Pas de liste à puces : un seul paragraphe."""
+
+PREBRIEF_SYSTEM = BASE_SYSTEM + """
+Tu es le copilote IA des personal shoppers d'une plateforme de personal shopping phygital.
+On te donne le profil d'un client et celui de son personal shopper.
+Rédige un pré-brief en Markdown pour préparer la séance, avec exactement cette structure :
+- première ligne, en gras : **Pré-brief pour la séance de personal shopping avec <prénom du client>**
+- puis 4 sections de niveau 3 : ### 1. Résumé du client / ### 2. Points d'attention / ### 3. Pistes de préparation / ### 4. Recommandations de déroulé de séance
+- dans chaque section, des puces avec labels en gras (ex. * **Style** : ..., * **Budget** : ..., * **Objectif** : ...).
+Contenu : 1. style, budget, objectif, contexte pro / moment de vie ; 2. confiance en soi, freins possibles, sensibilités ; 3. silhouettes, pièces clés, où chercher (types de boutiques, gammes) ; 4. format (présentiel/visio), étapes de la séance.
+Réponds uniquement avec le Markdown final."""
+
+
+def _profiles(client: Dict, shopper: Dict) -> str:
+    return f"Client\n{compact(client, CLIENT_FIELDS)}\n\nPersonal shopper\n{compact(shopper, SHOPPER_FIELDS)}"
+
+
+def summary_prompt(client: Dict, shopper: Dict) -> Prompt:
+    return Prompt(SUMMARY_SYSTEM, _profiles(client, shopper))
+
+
+def prebrief_prompt(client: Dict, shopper: Dict) -> Prompt:
+    """Prompt du pré-brief (construit sans appel réseau)."""
+    user = _profiles(client, shopper)
+    if not client.get("prenom"):
+        user += "\n\n(prénom inconnu : écrire « le client »)"
+    return Prompt(PREBRIEF_SYSTEM, user)
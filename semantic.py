@@ -0,0 +1,187 @@
+import os
+import json
+import zlib
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from locks import file_lock
+from matching import ShopperIndex, normalize_city, zone_id
+
+# ============================================================
+# 1. VECTORISATION (HASHING, SANS MODÈLE)
+# ============================================================
+
+# Dimension des vecteurs : fixe, pour que l'index reste incrémental
+DIM = 2 ** 12
+NGRAMS = (3, 4)
+
+
+def _tokens(text: str) -> List[str]:
+    # "_" et "#" des tags / objectifs deviennent des espaces
+    return normalize_city(text.replace("_", " ").replace("#", " ")).split()
+
+
+def _features(text: str) -> Iterable[str]:
+    for word in _tokens(text):
+        yield word
+        padded = f"<{word}>"
+        # N-grammes de caractères : "street" et "streetwear" partagent leurs préfixes
+        for n in NGRAMS:
+            for i in range(len(padded) - n + 1):
+                yield padded[i:i + n]
+
+
+def embed(text: str) -> np.ndarray:
+    """Vecteur normé (hashing signé des mots et n-grammes), stable d'un processus à l'autre."""
+    vec = np.zeros(DIM, dtype=np.float32)
+    for feature in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % DIM] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def shopper_text(shopper: Dict) -> str:
+    return " ".join(shopper.get("styles", []) + shopper.get("specialites", []) + shopper.get("tags", []))
+
+
+def client_text(client: Dict) -> str:
+    return " ".join(list(client.get("style") or []) + [client.get("objective", ""), client.get("extra_info", "")])
+
+
+# ============================================================
+# 2. INDEX VECTORIEL SUR DISQUE (INCRÉMENTAL)
+# ============================================================
+
+class SemanticIndex:
+    """
+    Vecteurs des shoppers, en ajout seul sur disque :
+    - `<path>.f32` : une ligne float32 de DIM valeurs par vecteur ;
+    - `<path>.jsonl` : {"id", "sig", "row"} par vecteur écrit.
+    `sync` n'embarque que les shoppers nouveaux ou dont le profil a changé
+    (empreinte différente) ; la dernière ligne d'un id fait foi.
+    Plusieurs processus (workers uvicorn, Streamlit) peuvent synchroniser
+    au démarrage : les écritures passent par un verrou `<path>.lock`.
+    """
+
+    def __init__(self, path: str = "shopper_vectors"):
+        self.vectors_path = path + ".f32"
+        self.meta_path = path + ".jsonl"
+        self.lock_path = path + ".lock"
+        self.rows: Dict[int, int] = {}
+        self.signatures: Dict[int, str] = {}
+        self._load()
+
+    def _load(self):
+        self.rows.clear()
+        self.signatures.clear()
+        if not os.path.exists(self.meta_path):
+            return
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        n_rows = size // (DIM * 4)
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # ligne tronquée (arrêt brutal)
+                if entry["row"] < n_rows:
+                    self.rows[entry["id"]] = entry["row"]
+                    self.signatures[entry["id"]] = entry["sig"]
+
+    def _matrix(self) -> np.ndarray:
+        if not os.path.exists(self.vectors_path):
+            return np.zeros((0, DIM), dtype=np.float32)
+        return np.fromfile(self.vectors_path, dtype=np.float32).reshape(-1, DIM)
+
+    def sync(self, shoppers: Iterable[Dict]) -> int:
+        """Ajoute les vecteurs manquants ou périmés ; renvoie le nombre de shoppers embarqués."""
+        texts: Dict[int, Tuple[str, str]] = {}
+        for shopper in shoppers:
+            text = shopper_text(shopper)
+            texts[shopper["id"]] = (hashlib.sha1(text.encode("utf-8")).hexdigest(), text)
+        if all(self.signatures.get(sid) == sig for sid, (sig, _) in texts.items()):
+            return 0
+
+        with file_lock(self.lock_path):
+            # Un autre processus a pu écrire depuis notre lecture : on repart du disque
+            self._load()
+            pending = [
+                (sid, sig, text) for sid, (sig, text) in texts.items()
+                if self.signatures.get(sid) != sig
+            ]
+            if not pending:
+                return 0
+
+            # Lignes complètes uniquement : une écriture interrompue est écrasée
+            size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+            next_row = size // (DIM * 4)
+            with open(self.vectors_path, "ab") as vf, open(self.meta_path, "a", encoding="utf-8") as mf:
+                vf.truncate(next_row * DIM * 4)
+                for sid, sig, text in pending:
+                    vf.write(embed(text).tobytes())
+                    mf.write(json.dumps({"id": sid, "sig": sig, "row": next_row}) + "\n")
+                    self.rows[sid] = next_row
+                    self.signatures[sid] = sig
+                    next_row += 1
+        return len(pending)
+
+    def aligned(self, ids: List[int]) -> np.ndarray:
+        """Matrice (len(ids) × DIM) dans l'ordre demandé ; zéros pour un id absent."""
+        matrix = self._matrix()
+        out = np.zeros((len(ids), DIM), dtype=np.float32)
+        for i, sid in enumerate(ids):
+            row = self.rows.get(sid)
+            if row is not None:
+                out[i] = matrix[row]
+        return out
+
+
+def hybrid_from_env(index: ShopperIndex) -> Optional["HybridScorer"]:
+    """MATCHING_MODE=hybrid active le mode sémantique (index : SEMANTIC_INDEX_PATH)."""
+    if os.getenv("MATCHING_MODE", "rules") != "hybrid":
+        return None
+    vectors = SemanticIndex(os.getenv("SEMANTIC_INDEX_PATH", "shopper_vectors"))
+    vectors.sync(index.shoppers)
+    return HybridScorer(index, vectors)
+
+
+# ============================================================
+# 3. SCORE HYBRIDE
+# ============================================================
+
+# Similarité cosinus en dessous de laquelle on ne donne aucun bonus
+SEMANTIC_MIN = 0.15
+# Bonus maximal (similarité 1) : du même ordre qu'un critère métier
+SEMANTIC_WEIGHT = 3.0
+
+
+class HybridScorer:
+    """
+    Bonus de similarité à ajouter au score métier (voir top_matches),
+    aligné sur index.shoppers.
+    """
+
+    def __init__(self, index: ShopperIndex, vectors: SemanticIndex, weight: float = SEMANTIC_WEIGHT):
+        self.index = index
+        self.weight = weight
+        self.matrix = vectors.aligned(index.ids)
+
+    def similarities(self, client: Dict) -> np.ndarray:
+        text = client_text(client)
+        if not text.strip():
+            return np.zeros(len(self.index), dtype=np.float32)
+        return self.matrix @ embed(text)
+
+    def bonus(self, client: Dict) -> np.ndarray:
+        sims = self.similarities(client)
+        bonus = np.where(sims >= SEMANTIC_MIN, sims, 0.0) * self.weight
+
+        # Présentiel hors zone : éliminé, même avec un profil proche
+        if client["mode"] == "presentiel" and zone_id(client.get("city", "")):
+            allowed = np.zeros(len(self.index), dtype=bool)
+            allowed[self.index.area_positions(client["city"])] = True
+            bonus = np.where(allowed, bonus, 0.0)
+        return bonus
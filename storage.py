@@ -0,0 +1,887 @@
+import os
+import gzip
+import json
+import shutil
+import sqlite3
+import struct
+import threading
+from uuid import uuid4
+from datetime import datetime
+from typing import List, Dict, Optional, Iterator, Iterable, Set, Tuple
+
+from locks import file_lock
+
+# ============================================================
+# 1. INTERFACE COMMUNE
+# ============================================================
+
+def new_assignment(client: Dict, shopper: Dict) -> Dict:
+    """Assignation client → shopper, pré-brief en attente de génération."""
+    return {
+        "id": str(uuid4()),
+        "timestamp": datetime.utcnow().isoformat(),
+        "shopper_id": shopper["id"],
+        "shopper_nom": shopper["nom"],
+        "client": client,
+        "prebrief": "",
+        "prebrief_status": "pending",
+    }
+
+
+class AssignmentStore:
+    """
+    Interface des backends de persistance des assignations.
+    Toutes les lectures renvoient des dicts identiques à ceux passés à `append`.
+    """
+
+    def append(self, assignment: Dict):
+        raise NotImplementedError
+
+    def append_many(self, assignments: Iterable[Dict]):
+        for assignment in assignments:
+            self.append(assignment)
+
+    def update(self, assignment: Dict):
+        """Remplace l'assignation de même `id` (ajoutée si elle n'existe pas)."""
+        raise NotImplementedError
+
+    def load_all(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def load_for_shopper(self, shopper_id, limit: Optional[int] = None) -> List[Dict]:
+        """Assignations d'un shopper dans l'ordre chronologique (`limit` = les plus récentes)."""
+        raise NotImplementedError
+
+    def count_for_shopper(self, shopper_id) -> int:
+        raise NotImplementedError
+
+    def version(self):
+        """Valeur qui change à chaque écriture (clé d'invalidation des caches de lecture)."""
+        raise NotImplementedError
+
+    def recent_for_shopper(self, shopper_id, limit: int, offset: int = 0) -> List[Dict]:
+        """Page d'assignations d'un shopper, plus récentes en premier."""
+        raise NotImplementedError
+
+    def get_for_shopper(self, shopper_id, assignment_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def tail(self) -> Optional["JsonlTail"]:
+        """Lecteur des écritures à venir ; None si le backend ne sait pas les suivre."""
+        return None
+
+
+# ============================================================
+# 2. BACKEND JSONL (+ INDEX PAR SHOPPER)
+# ============================================================
+
+# Un offset = entier 64 bits little-endian
+_OFFSET = struct.Struct("<Q")
+
+_SEGMENT_SUFFIX = ".jsonl.gz"
+_SIDECAR_SUFFIX = ".idx.json"
+
+
+def _encode(assignment: Dict) -> bytes:
+    return (json.dumps(assignment, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _decode_lines(data: bytes) -> List[Dict]:
+    assignments = []
+    for line in data.splitlines():
+        try:
+            assignments.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return assignments
+
+
+class JsonlAssignmentStore(AssignmentStore):
+    """
+    Journal append-only `assignments.jsonl` accompagné d'un index par shopper.
+
+    L'index vit dans `<path>.idx/` :
+    - `<shopper_id>.offsets` : offsets (octets) des lignes de ce shopper
+    - `_covered` : taille du journal déjà indexée
+
+    Si le journal a grandi sans passer par `append` (ancienne version, autre
+    processus), la partie non indexée est rattrapée à la lecture suivante.
+
+    `rotate` scelle le journal actif dans `<path>.segments/` (voir section
+    segments) ; les lectures couvrent le journal actif puis les segments.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_dir = path + ".idx"
+        self.segments_dir = path + ".segments"
+        self.lock_path = path + ".lock"
+        self.carried_path = path + ".carried"
+        self.superseded_path = path + ".superseded"
+        self.corrupt_lines = 0
+        self._sidecars: Dict[str, Dict] = {}
+
+    def _lock(self, shared: bool = False):
+        """
+        Verrou inter-processus : exclusif pour toute écriture (journal, index,
+        segments), partagé pour les lectures qui s'appuient sur l'index,
+        qu'une rotation ne doit pas changer en cours.
+        """
+        return file_lock(self.lock_path, shared)
+
+    # ---------- index ----------
+
+    def _shard_path(self, shopper_id) -> str:
+        return os.path.join(self.index_dir, f"{shopper_id}.offsets")
+
+    def _covered_path(self) -> str:
+        return os.path.join(self.index_dir, "_covered")
+
+    def _read_covered(self) -> int:
+        try:
+            with open(self._covered_path(), "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_covered(self, size: int):
+        tmp = f"{self._covered_path()}.{uuid4().hex}.tmp"  # nom propre à chaque écriture
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(size))
+        os.replace(tmp, self._covered_path())
+
+    def _index_lines(self, shopper_id, offsets: List[int]):
+        if shopper_id is None:
+            return
+        with open(self._shard_path(shopper_id), "ab") as f:
+            f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+
+    def _scan(self, start: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """Parcourt le journal depuis `start` et renvoie (offset, assignation)."""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                line_offset = offset
+                offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_offset, json.loads(line)
+                except json.JSONDecodeError:
+                    self.corrupt_lines += 1
+                    continue
+
+    def _catch_up(self):
+        """Indexe les lignes ajoutées au journal depuis la dernière mise à jour."""
+        if not os.path.exists(self.path):
+            return
+        if self._read_covered() == os.path.getsize(self.path):
+            return  # cas courant : index à jour, aucun verrou pris
+        with self._lock():
+            self._sync_index()
+
+    def _sync_index(self):
+        """Rattrapage de l'index ; l'appelant détient le verrou exclusif."""
+        if not os.path.exists(self.path):
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        covered = self._read_covered()
+        size = os.path.getsize(self.path)
+        if covered > size:
+            # Journal remplacé ou tronqué → on reconstruit l'index
+            self._rebuild_index()
+            return
+        if covered == size:
+            return
+        fresh: Dict[object, List[Tuple[int, object]]] = {}
+        for offset, assignment in self._scan(covered):
+            fresh.setdefault(assignment.get("shopper_id"), []).append((offset, assignment.get("id")))
+        for shopper_id, lines in fresh.items():
+            self._merge_shard(shopper_id, lines)
+        self._write_covered(size)
+
+    def _merge_shard(self, shopper_id, lines: List[Tuple[int, object]]):
+        """
+        Indexe des lignes (offset, id) d'un shopper avec une seule entrée par id :
+        une nouvelle version prend la place de l'ancienne (comme `update`), une
+        ligne déjà indexée (arrêt avant l'écriture de `_covered`) est ignorée.
+        """
+        if shopper_id is None:
+            return
+        offsets = self._offsets(shopper_id)
+        known = set(offsets)
+        slots = {aid: i for i, aid in enumerate(self._ids_at(offsets)) if aid is not None}
+        for offset, aid in lines:
+            if offset in known:
+                continue
+            slot = slots.get(aid) if aid is not None else None
+            if slot is None:
+                if aid is not None:
+                    slots[aid] = len(offsets)
+                offsets.append(offset)
+            else:
+                offsets[slot] = offset
+        self._write_shard(shopper_id, offsets)
+
+    def _write_shard(self, shopper_id, offsets: List[int]):
+        tmp = f"{self._shard_path(shopper_id)}.{uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+        os.replace(tmp, self._shard_path(shopper_id))
+
+    def rebuild_index(self):
+        with self._lock():
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        for name in os.listdir(self.index_dir):
+            os.remove(os.path.join(self.index_dir, name))
+        self._write_covered(0)
+        self._sync_index()
+        # Les reports doivent rester en tête de leur index, même ajoutés en fin de journal
+        for key, ids in self._carried().items():
+            offsets = self._offsets(key)
+            carried = set(ids)
+            head = [o for o, aid in zip(offsets, self._ids_at(offsets)) if aid in carried]
+            if head != offsets[:len(head)]:
+                head_set = set(head)
+                self._write_shard(key, head + [o for o in offsets if o not in head_set])
+
+    # ---------- segments ----------
+    #
+    # Un segment scellé = deux fichiers dans `<path>.segments/` :
+    # - `<horodatage>.jsonl.gz` : un membre gzip par shopper, lignes dans
+    #   l'ordre chronologique (le fichier entier reste lisible par zcat) ;
+    # - `<horodatage>.idx.json` : {"count", "first_ts", "last_ts",
+    #   "shoppers": {shopper_id: [offset, longueur, nb de lignes,
+    #   premier horodatage, dernier horodatage]}}.
+    # Lire un shopper ne décompresse que son membre, et seulement dans les
+    # segments nécessaires à la page demandée (comptes et bornes du sidecar).
+    #
+    # Les assignations reportées par `rotate` (pré-brief en attente) sont en
+    # tête du journal actif ; `<path>.carried` donne leurs ids par shopper.
+    # Elles sont classées avec les segments, par horodatage ; le reste du
+    # journal actif est plus récent que tout le contenu scellé.
+    #
+    # Une assignation déjà scellée peut encore être mise à jour (job repris
+    # par un second worker) : sa copie scellée est déclarée remplacée dans
+    # `<path>.superseded` ({segment: {shopper_id: [ids]}}) et la nouvelle
+    # version rejoint les reports, pour garder sa place chronologique.
+
+    def _segments(self) -> List[Tuple[str, Dict]]:
+        """(chemin du segment, sidecar), du plus ancien au plus récent."""
+        try:
+            names = sorted(n for n in os.listdir(self.segments_dir) if n.endswith(_SIDECAR_SUFFIX))
+        except FileNotFoundError:
+            return []
+        segments = []
+        for name in names:
+            sidecar = self._sidecars.get(name)
+            if sidecar is None:  # segments immuables : sidecar lu une seule fois
+                with open(os.path.join(self.segments_dir, name), "r", encoding="utf-8") as f:
+                    sidecar = self._sidecars[name] = json.load(f)
+            path = os.path.join(self.segments_dir, name[: -len(_SIDECAR_SUFFIX)] + _SEGMENT_SUFFIX)
+            segments.append((path, sidecar))
+        return segments
+
+    @staticmethod
+    def _segment_member(path: str, entry: List) -> List[Dict]:
+        offset, length = entry[0], entry[1]
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return _decode_lines(gzip.decompress(f.read(length)))
+
+    @staticmethod
+    def _read_json(path: str) -> Dict:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def _write_json(path: str, data: Dict):
+        tmp = f"{path}.{uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _carried(self) -> Dict[str, List[str]]:
+        return self._read_json(self.carried_path)
+
+    def _superseded(self) -> Dict[str, Dict[str, List[str]]]:
+        return self._read_json(self.superseded_path)
+
+    def _sealed_entries(self, shopper_id) -> List[Tuple[str, List, Set[str]]]:
+        """(segment, entrée du sidecar, ids remplacés) d'un shopper, du plus ancien au plus récent."""
+        key = str(shopper_id)
+        superseded = self._superseded()
+        entries = []
+        for path, sidecar in self._segments():
+            entry = sidecar["shoppers"].get(key)
+            if entry:
+                gone = set(superseded.get(os.path.basename(path), {}).get(key, ()))
+                entries.append((path, entry, gone))
+        return entries
+
+    def _sealed_member(self, path: str, entry: List, gone: Set[str]) -> List[Dict]:
+        assignments = self._segment_member(path, entry)
+        if gone:
+            assignments = [a for a in assignments if a.get("id") not in gone]
+        return assignments
+
+    def _supersede_sealed(self, assignment: Dict) -> bool:
+        """Déclare remplacée la copie scellée de l'assignation ; False si elle n'est pas scellée."""
+        aid, key = assignment.get("id"), str(assignment.get("shopper_id"))
+        for path, entry, gone in reversed(self._sealed_entries(key)):
+            if aid in gone or not any(a.get("id") == aid for a in self._segment_member(path, entry)):
+                continue
+            superseded = self._superseded()
+            superseded.setdefault(os.path.basename(path), {}).setdefault(key, []).append(aid)
+            self._write_json(self.superseded_path, superseded)
+            return True
+        return False
+
+    def _sealed_recent(self, shopper_id, carried: List[Dict], limit: int, offset: int = 0) -> List[Dict]:
+        """
+        Assignations reportées et segments d'un shopper, fusionnés par horodatage
+        (plus récentes en premier). Un segment n'est décompressé que si la page
+        l'atteint : tant qu'il n'est pas ouvert, son dernier horodatage lui sert
+        de tête, et s'il précède tout le reste en bloc, il est sauté par son compte.
+        """
+        # Source = [assignations décroissantes ou None si non ouvert, position,
+        #           chemin, entrée, ids remplacés]
+        sources = []
+        if carried:
+            sources.append([sorted(carried, key=lambda a: a.get("timestamp", ""), reverse=True), 0, None, None, None])
+        for path, entry, gone in self._sealed_entries(shopper_id):
+            sources.append([None, 0, path, entry, gone])
+
+        def head(source) -> str:
+            items, pos, _, entry, _ = source
+            return entry[4] if items is None else items[pos].get("timestamp", "")
+
+        assignments: List[Dict] = []
+        while limit > 0 and sources:
+            source = max(sources, key=head)
+            items, pos, path, entry, gone = source
+            if items is None:
+                count = entry[2] - len(gone)
+                if offset >= count and all(entry[3] >= head(o) for o in sources if o is not source):
+                    offset -= count  # segment entièrement avant la page : pas décompressé
+                    sources.remove(source)
+                    continue
+                member = self._sealed_member(path, entry, gone)
+                source[0] = sorted(member, key=lambda a: a.get("timestamp", ""), reverse=True)
+                if not source[0]:
+                    sources.remove(source)
+                continue
+            source[1] += 1
+            if source[1] == len(items):
+                sources.remove(source)
+            if offset:
+                offset -= 1
+                continue
+            assignments.append(items[pos])
+            limit -= 1
+        return assignments
+
+    def _write_segment(self, assignments: List[Dict]) -> str:
+        os.makedirs(self.segments_dir, exist_ok=True)
+        base = os.path.join(self.segments_dir, datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"))
+
+        by_shopper: Dict[str, List[bytes]] = {}
+        times: Dict[str, List[str]] = {}
+        for assignment in assignments:
+            key, ts = str(assignment.get("shopper_id")), assignment.get("timestamp", "")
+            by_shopper.setdefault(key, []).append(_encode(assignment))
+            bounds = times.setdefault(key, [ts, ts])
+            bounds[0], bounds[1] = min(bounds[0], ts), max(bounds[1], ts)
+        shoppers: Dict[str, List] = {}
+        offset = 0
+        with open(base + _SEGMENT_SUFFIX + ".tmp", "wb") as f:
+            for shopper_id, lines in by_shopper.items():
+                member = gzip.compress(b"".join(lines))
+                shoppers[shopper_id] = [offset, len(member), len(lines)] + times[shopper_id]
+                f.write(member)
+                offset += len(member)
+
+        timestamps = [a.get("timestamp", "") for a in assignments]
+        sidecar = {
+            "count": len(assignments),
+            "first_ts": min(timestamps),
+            "last_ts": max(timestamps),
+            "shoppers": shoppers,
+        }
+        with open(base + _SIDECAR_SUFFIX + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(sidecar, f)
+        # Le sidecar en dernier : un segment n'est visible qu'une fois complet
+        os.replace(base + _SEGMENT_SUFFIX + ".tmp", base + _SEGMENT_SUFFIX)
+        os.replace(base + _SIDECAR_SUFFIX + ".tmp", base + _SIDECAR_SUFFIX)
+        return base + _SEGMENT_SUFFIX
+
+    def rotate(self) -> Optional[str]:
+        """
+        Scelle le journal actif dans un segment compressé (une seule version par
+        assignation, lignes illisibles écartées). Les assignations au pré-brief
+        encore en attente restent en tête du nouveau journal actif : le worker
+        doit pouvoir les y mettre à jour. Renvoie le segment créé, ou None.
+        """
+        with self._lock():
+            if not os.path.exists(self.path):
+                return None
+            latest: Dict[object, Dict] = {}
+            for _, assignment in self._scan():
+                latest[assignment.get("id") or object()] = assignment
+            sealed = [a for a in latest.values() if a.get("prebrief_status") != "pending"]
+            if not sealed:
+                return None
+            pending = [a for a in latest.values() if a.get("prebrief_status") == "pending"]
+
+            carried: Dict[str, List[str]] = {}
+            for assignment in pending:
+                carried.setdefault(str(assignment.get("shopper_id")), []).append(assignment.get("id"))
+
+            segment = self._write_segment(sealed)
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(b"".join(_encode(a) for a in pending))
+            os.replace(tmp, self.path)
+            self._write_json(self.carried_path, carried)
+            self._rebuild_index()
+        return segment
+
+    def expire(self, before: str, archive_dir: Optional[str] = None) -> int:
+        """
+        Retire les segments dont toutes les assignations sont antérieures à
+        `before` (horodatage ISO) : déplacés dans `archive_dir`, sinon supprimés.
+        Renvoie le nombre d'assignations retirées.
+        """
+        removed = 0
+        with self._lock():
+            for path, sidecar in self._segments():
+                if sidecar["last_ts"] >= before:
+                    continue
+                sidecar_path = path[: -len(_SEGMENT_SUFFIX)] + _SIDECAR_SUFFIX
+                for file in (sidecar_path, path):  # sidecar d'abord : les lecteurs l'ignorent aussitôt
+                    if archive_dir:
+                        os.makedirs(archive_dir, exist_ok=True)
+                        shutil.move(file, os.path.join(archive_dir, os.path.basename(file)))
+                    else:
+                        os.remove(file)
+                self._sidecars.pop(os.path.basename(sidecar_path), None)
+                removed += sidecar["count"]
+                superseded = self._superseded()
+                if superseded.pop(os.path.basename(path), None) is not None:
+                    self._write_json(self.superseded_path, superseded)
+        return removed
+
+    def oldest_timestamp(self) -> Optional[str]:
+        """Horodatage de la première assignation du journal actif."""
+        if not os.path.exists(self.path):
+            return None
+        for _, assignment in self._scan():
+            return assignment.get("timestamp")
+        return None
+
+    # ---------- API ----------
+
+    def append(self, assignment: Dict):
+        self.append_many([assignment])
+
+    def append_many(self, assignments: Iterable[Dict]):
+        with self._lock():
+            self._append_many(assignments)
+
+    def _append_many(self, assignments: Iterable[Dict]):
+        self._sync_index()
+        os.makedirs(self.index_dir, exist_ok=True)
+        by_shopper: Dict[object, List[int]] = {}
+        chunks: List[bytes] = []
+        with open(self.path, "ab") as f:
+            start = offset = f.tell()
+            for assignment in assignments:
+                line = _encode(assignment)
+                by_shopper.setdefault(assignment.get("shopper_id"), []).append(offset)
+                chunks.append(line)
+                offset += len(line)
+            f.write(b"".join(chunks))
+        for shopper_id, offsets in by_shopper.items():
+            self._index_lines(shopper_id, offsets)
+        if offset != start:
+            self._write_covered(offset)
+
+    def update(self, assignment: Dict):
+        """
+        La nouvelle version est ajoutée en fin de journal et son offset remplace
+        celui de l'ancienne dans l'index du shopper (même position d'affichage).
+        Si l'ancienne est déjà scellée, elle est déclarée remplacée et la
+        nouvelle rejoint les reports (classés par horodatage avec les segments).
+        """
+        with self._lock():
+            self._update(assignment)
+
+    def _update(self, assignment: Dict):
+        shopper_id = assignment.get("shopper_id")
+        self._sync_index()
+        offsets = self._offsets(shopper_id)
+        slot = None
+        with open(self.path, "rb") as f:
+            # Les mises à jour concernent en général des assignations récentes
+            for i in range(len(offsets) - 1, -1, -1):
+                f.seek(offsets[i])
+                try:
+                    previous = json.loads(f.readline())
+                except json.JSONDecodeError:
+                    continue
+                if previous.get("id") == assignment.get("id"):
+                    slot = i
+                    break
+        if slot is None:
+            if self._supersede_sealed(assignment):
+                self._append_carried(assignment)
+            else:
+                self._append_many([assignment])
+            return
+
+        line = _encode(assignment)
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(line)
+        with open(self._shard_path(shopper_id), "r+b") as f:
+            f.seek(slot * _OFFSET.size)
+            f.write(_OFFSET.pack(offset))
+        self._write_covered(offset + len(line))
+
+    def _append_carried(self, assignment: Dict):
+        """Ajoute la version à jour d'une assignation scellée, indexée en tête avec les reports."""
+        key = str(assignment.get("shopper_id"))
+        line = _encode(assignment)
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(line)
+        carried = self._carried()
+        ids = carried.setdefault(key, [])
+        offsets = self._offsets(key)
+        offsets.insert(len(ids), offset)
+        ids.append(assignment.get("id"))
+        self._write_shard(key, offsets)
+        self._write_json(self.carried_path, carried)
+        self._write_covered(offset + len(line))
+
+    def load_all(self) -> List[Dict]:
+        # Dernière version de chaque assignation, à la position de la première
+        latest: Dict[object, Dict] = {}
+        with self._lock(shared=True):
+            segments = self._segments()
+            for path, _ in segments:
+                with open(path, "rb") as f:
+                    for assignment in _decode_lines(gzip.decompress(f.read())):
+                        latest[assignment.get("id") or object()] = assignment
+            if os.path.exists(self.path):
+                for _, assignment in self._scan():
+                    latest[assignment.get("id") or object()] = assignment
+        if segments:
+            # Membres groupés par shopper, reports en tête du journal : ordre chronologique
+            return sorted(latest.values(), key=lambda a: a.get("timestamp", ""))
+        return list(latest.values())
+
+    def _offsets(self, shopper_id) -> List[int]:
+        try:
+            with open(self._shard_path(shopper_id), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        return [o for (o,) in _OFFSET.iter_unpack(data)]
+
+    def _ids_at(self, offsets: List[int]) -> List[Optional[str]]:
+        ids = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                try:
+                    ids.append(json.loads(f.readline()).get("id"))
+                except json.JSONDecodeError:
+                    ids.append(None)
+        return ids
+
+    def _read_at(self, offsets: Iterable[int]) -> List[Dict]:
+        assignments = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                line = f.readline().strip()
+                try:
+                    assignments.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return assignments
+
+    def load_for_shopper(self, shopper_id, limit: Optional[int] = None) -> List[Dict]:
+        if limit is None:
+            limit = self.count_for_shopper(shopper_id)
+        elif limit <= 0:
+            return []
+        return self.recent_for_shopper(shopper_id, limit)[::-1]
+
+    def count_for_shopper(self, shopper_id) -> int:
+        self._catch_up()
+        with self._lock(shared=True):
+            sealed = sum(entry[2] - len(gone) for _, entry, gone in self._sealed_entries(shopper_id))
+            return len(self._offsets(shopper_id)) + sealed
+
+    def recent_for_shopper(self, shopper_id, limit: int, offset: int = 0) -> List[Dict]:
+        # Seules les lignes de ce shopper sont lues : journal actif via son
+        # fichier d'offsets, puis reports et segments si la page va plus loin
+        self._catch_up()
+        with self._lock(shared=True):
+            offsets = self._offsets(shopper_id)
+            n_carried = len(self._carried().get(str(shopper_id), ()))
+            fresh = offsets[n_carried:][::-1]
+            page = fresh[offset:offset + limit]
+            assignments = self._read_at(page) if page else []
+            if len(page) < limit:
+                carried = self._read_at(offsets[:n_carried]) if n_carried else []
+                assignments += self._sealed_recent(
+                    shopper_id, carried, limit - len(page), max(0, offset - len(fresh))
+                )
+        return assignments
+
+    def get_for_shopper(self, shopper_id, assignment_id: str) -> Optional[Dict]:
+        # On ne parcourt que les lignes de ce shopper, des plus récentes aux plus anciennes
+        self._catch_up()
+        with self._lock(shared=True):
+            offsets = self._offsets(shopper_id)
+            if offsets:
+                with open(self.path, "rb") as f:
+                    for offset in reversed(offsets):
+                        f.seek(offset)
+                        try:
+                            assignment = json.loads(f.readline())
+                        except json.JSONDecodeError:
+                            continue
+                        if assignment.get("id") == assignment_id:
+                            return assignment
+            for path, entry, gone in reversed(self._sealed_entries(shopper_id)):
+                for assignment in self._sealed_member(path, entry, gone):
+                    if assignment.get("id") == assignment_id:
+                        return assignment
+        return None
+
+    def tail(self) -> "JsonlTail":
+        # Démarre à la fin actuelle : l'existant se lit via l'index
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        return JsonlTail(self.path, size)
+
+    def version(self):
+        # Journal append-only : toute écriture change la taille et la date ;
+        # rotation et rétention modifient le répertoire des segments
+        try:
+            st = os.stat(self.path)
+            active = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            active = (0, 0)
+        try:
+            return active + (os.stat(self.segments_dir).st_mtime_ns,)
+        except FileNotFoundError:
+            return active
+
+
+class JsonlTail:
+    """
+    Suivi incrémental du journal : `poll` ne lit que les octets ajoutés depuis
+    l'appel précédent (lignes complètes uniquement) et renvoie les assignations
+    correspondantes, mises à jour comprises (même `id`, version plus récente).
+    Si le journal est remplacé ou tronqué, la lecture reprend à son début.
+    """
+
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        self.offset = offset
+        self._inode = self._stat_inode()
+
+    def _stat_inode(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+
+    def poll(self) -> List[Dict]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if st.st_ino != self._inode or st.st_size < self.offset:
+            self._inode, self.offset = st.st_ino, 0
+        if st.st_size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        end = data.rfind(b"\n") + 1  # ligne en cours d'écriture : lue au prochain appel
+        self.offset += end
+
+        assignments = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                assignments.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return assignments
+
+
+# ============================================================
+# 3. BACKEND SQLITE (WAL)
+# ============================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE,
+    timestamp TEXT NOT NULL DEFAULT '',
+    shopper_id INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_shopper_ts
+    ON assignments (shopper_id, timestamp, seq);
+CREATE INDEX IF NOT EXISTS idx_assignments_ts
+    ON assignments (timestamp);
+
+-- Compteur incrémenté à chaque écriture, y compris depuis d'autres processus
+CREATE TABLE IF NOT EXISTS store_meta (version INTEGER NOT NULL);
+INSERT INTO store_meta (version) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM store_meta);
+CREATE TRIGGER IF NOT EXISTS trg_assignments_insert AFTER INSERT ON assignments
+BEGIN UPDATE store_meta SET version = version + 1; END;
+CREATE TRIGGER IF NOT EXISTS trg_assignments_update AFTER UPDATE ON assignments
+BEGIN UPDATE store_meta SET version = version + 1; END;
+CREATE TRIGGER IF NOT EXISTS trg_assignments_delete AFTER DELETE ON assignments
+BEGIN UPDATE store_meta SET version = version + 1; END;
+"""
+
+_SQL_INSERT = (
+    "INSERT OR REPLACE INTO assignments (id, timestamp, shopper_id, data) "
+    "VALUES (?, ?, ?, ?)"
+)
+_SQL_UPDATE = "UPDATE assignments SET data = ? WHERE id = ?"
+_SQL_ALL = "SELECT data FROM assignments ORDER BY timestamp, seq"
+_SQL_SHOPPER_RECENT = (
+    "SELECT data FROM assignments WHERE shopper_id = ? "
+    "ORDER BY timestamp DESC, seq DESC LIMIT ? OFFSET ?"
+)
+_SQL_SHOPPER_COUNT = "SELECT COUNT(*) FROM assignments WHERE shopper_id = ?"
+_SQL_VERSION = "SELECT version FROM store_meta"
+_SQL_GET = "SELECT data FROM assignments WHERE id = ? AND shopper_id = ?"
+
+
+class SqliteAssignmentStore(AssignmentStore):
+    """
+    Backend SQLite en mode WAL : écritures sûres entre plusieurs processus
+    Streamlit, lectures par shopper via index (shopper_id, timestamp).
+    Une connexion par thread ; sqlite3 garde en cache les requêtes préparées.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(assignment: Dict) -> Tuple:
+        return (
+            assignment.get("id"),
+            assignment.get("timestamp", ""),
+            assignment.get("shopper_id"),
+            json.dumps(assignment, ensure_ascii=False),
+        )
+
+    def append(self, assignment: Dict):
+        self.append_many([assignment])
+
+    def append_many(self, assignments: Iterable[Dict]):
+        conn = self._connect()
+        with conn:
+            conn.executemany(_SQL_INSERT, (self._row(a) for a in assignments))
+
+    def update(self, assignment: Dict):
+        conn = self._connect()
+        with conn:
+            cur = conn.execute(
+                _SQL_UPDATE, (json.dumps(assignment, ensure_ascii=False), assignment.get("id"))
+            )
+        if cur.rowcount == 0:
+            self.append(assignment)
+
+    def load_all(self) -> List[Dict]:
+        return [json.loads(data) for (data,) in self._connect().execute(_SQL_ALL)]
+
+    def load_for_shopper(self, shopper_id, limit: Optional[int] = None) -> List[Dict]:
+        if limit is None:
+            limit = -1  # pas de limite pour SQLite
+        elif limit <= 0:
+            return []
+        return self.recent_for_shopper(shopper_id, limit)[::-1]
+
+    def count_for_shopper(self, shopper_id) -> int:
+        return self._connect().execute(_SQL_SHOPPER_COUNT, (shopper_id,)).fetchone()[0]
+
+    def recent_for_shopper(self, shopper_id, limit: int, offset: int = 0) -> List[Dict]:
+        rows = self._connect().execute(_SQL_SHOPPER_RECENT, (shopper_id, limit, offset))
+        return [json.loads(data) for (data,) in rows]
+
+    def get_for_shopper(self, shopper_id, assignment_id: str) -> Optional[Dict]:
+        row = self._connect().execute(_SQL_GET, (assignment_id, shopper_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def version(self):
+        return self._connect().execute(_SQL_VERSION).fetchone()[0]
+
+
+# ============================================================
+# 4. SÉLECTION DU BACKEND
+# ============================================================
+
+BACKENDS = {
+    "jsonl": JsonlAssignmentStore,
+    "sqlite": SqliteAssignmentStore,
+}
+
+
+def default_assignments_path(backend: str) -> str:
+    return "assignments.db" if backend == "sqlite" else "assignments.jsonl"
+
+
+def open_assignment_store(backend: str, path: str) -> AssignmentStore:
+    try:
+        return BACKENDS[backend](path)
+    except KeyError:
+        raise ValueError(
+            f"Backend d'assignations inconnu : {backend!r} (attendu : {', '.join(BACKENDS)})"
+        ) from None
+
+
+def store_from_env() -> AssignmentStore:
+    """Backend choisi via ASSIGNMENTS_BACKEND ("jsonl" par défaut) et ASSIGNMENTS_PATH."""
+    backend = os.getenv("ASSIGNMENTS_BACKEND", "jsonl")
+    path = os.getenv("ASSIGNMENTS_PATH") or default_assignments_path(backend)
+    return open_assignment_store(backend, path)
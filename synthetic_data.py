@@ -0,0 +1,98 @@
+"""
+Données synthétiques reproductibles (graine fixe) ayant la forme de
+shoppers_data.SHOPPERS et du formulaire client, pour les benchmarks et les tests.
+Import sans effet de bord (pas de variable d'environnement modifiée).
+"""
+import random
+from typing import Dict, List
+
+from shoppers_data import SHOPPERS
+
+
+def _values(field: str) -> List:
+    return sorted({v for s in SHOPPERS for v in s[field]})
+
+
+ZONES = sorted({s["zone"] for s in SHOPPERS})
+BUDGET_LEVELS = ["bas", "moyen", "élevé", "luxe"]
+
+CLIENT_CITIES = ZONES + [
+    "paris 15e", "Paris La Defense", "Lyon 3e", "Saint-Étienne", "Aix-en-Provence",
+    "Versailles", "Genève", "Toulon", "Roubaix", "Nanterre", "Villeurbanne", "",
+]
+CLIENT_STYLES = ["casual", "chic", "streetwear", "minimal", "bohème", "élégant"]
+CLIENT_BUDGETS = ["", "moins de 100€", "100 - 300€", "300 - 1000€", "plus de 1000€"]
+CLIENT_OBJECTIVES = ["", "style_pro", "mariage", "confiance_en_soi", "grandes_tailles", "petit_budget", "relooking"]
+CLIENT_LIFE_EVENTS = ["aucun_particulier", "nouveau_job", "reconversion", "grossesse/post-partum", "séparation"]
+EXTRA_WORDS = [
+    "mariage", "street", "casual", "je veux du chic", "tri dressing", "working girl",
+    "colorimétrie", "seconde main", "sneakers", "business", "noir", "beige",
+    "grande taille", "capsule wardrobe", "éco-responsable", "pas de talons",
+]
+
+
+def synthetic_shoppers(n: int, seed: int = 0) -> List[Dict]:
+    """Catalogue de `n` shoppers ayant la forme de SHOPPERS."""
+    r = random.Random(seed)
+    genres, specialites, styles = _values("genre_clients"), _values("specialites"), _values("styles")
+    formats, tags = _values("formats"), _values("tags")
+    catalog = []
+    for i in range(n):
+        low = r.randrange(len(BUDGET_LEVELS))
+        catalog.append({
+            "id": i + 1,
+            "nom": f"Shopper {i + 1}",
+            "genre_clients": r.sample(genres, r.randint(1, 2)),
+            "specialites": r.sample(specialites, 3),
+            "styles": r.sample(styles, r.randint(2, 3)),
+            "zone": r.choice(ZONES),
+            "formats": r.sample(formats, r.randint(1, 3)),
+            "niveau_budget": BUDGET_LEVELS[low:low + r.randint(1, 2)],
+            "tags": r.sample(tags, 3),
+            "note_moyenne": round(r.uniform(3.5, 5.0), 1),
+        })
+    return catalog
+
+
+def synthetic_clients(n: int, seed: int = 0) -> List[Dict]:
+    """`n` clients au format du formulaire de page_client."""
+    r = random.Random(seed)
+    return [
+        {
+            "nom": f"Client{i}",
+            "prenom": r.choice(["Clara", "Inès", "Hugo", "Sami", "Léa", "Noah"]),
+            "gender": r.choice(["", "femme", "homme", "autre"]),
+            "job_sector": r.choice(["", "cadres", "startups", "freelances"]),
+            "work_env": r.choice(["", "Business casual", "Créatif / détendu"]),
+            "style": r.sample(CLIENT_STYLES, r.randint(0, 3)),
+            "size": r.choice(["", "S", "M", "L"]),
+            "budget": r.choice(CLIENT_BUDGETS),
+            "language": r.choice(["", "français", "anglais"]),
+            "city": r.choice(CLIENT_CITIES),
+            "favorite_brand": r.choice(["", "Zara", "Sézane", "Uniqlo"]),
+            "service_type": r.choice(["", "accompagnement_magasin", "virtual_style", "tri_dressing"]),
+            "objective": r.choice(CLIENT_OBJECTIVES),
+            "life_event": r.choice(CLIENT_LIFE_EVENTS),
+            "needs_confidence": r.random() < 0.3,
+            "mode": r.choice(["peu_importe", "presentiel", "visio"]),
+            "extra_info": " ".join(r.sample(EXTRA_WORDS, r.randint(0, 4))),
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_cities(n: int, seed: int = 0) -> List[str]:
+    """Saisies de villes variées (casse, accents, arrondissements, villes inconnues)."""
+    r = random.Random(seed)
+    cities = []
+    for i in range(n):
+        city = r.choice(CLIENT_CITIES)
+        roll = r.random()
+        if roll < 0.2:
+            city = city.upper()
+        elif roll < 0.4:
+            city = f"  {city} {r.randint(1, 20)}e "
+        elif roll < 0.5:
+            city = f"Commune {i}"
+        cities.append(city)
+    return cities
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Callable, List
+
+import httpx
+
+from llm_gateway import GroqGateway, LLMGatewayError
+
+
+def _ok(content: str = "pré-brief") -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "choices": [{"message": {"content": f" {content} "}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+        },
+    )
+
+
+def _call(responses: List[Callable[[], httpx.Response]], **options):
+    """Appelle complete() sur une passerelle simulée ; renvoie (résultat ou exception, nb d'appels)."""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        response = responses[min(len(calls), len(responses)) - 1]
+        return await response() if asyncio.iscoroutinefunction(response) else response()
+
+    async def run():
+        settings = dict(requests_per_minute=6000, tokens_per_minute=10 ** 6, backoff_base=0.001)
+        settings.update(options)
+        async with GroqGateway("test", transport=httpx.MockTransport(handler), **settings) as gateway:
+            try:
+                return await gateway.complete("prompt", "system", "model")
+            except LLMGatewayError as e:
+                return e
+
+    return asyncio.run(run()), calls
+
+
+def test_success_strips_content_and_authenticates():
+    result, calls = _call([_ok])
+    assert result == "pré-brief"
+    assert len(calls) == 1
+    assert calls[0].headers["authorization"] == "Bearer test"
+    assert calls[0].url.path.endswith("/chat/completions")
+
+
+def test_429_honours_retry_after_then_succeeds():
+    result, calls = _call([lambda: httpx.Response(429, headers={"retry-after": "0"}), _ok])
+    assert result == "pré-brief"
+    assert len(calls) == 2
+
+
+def test_network_error_is_retried():
+    def fail():
+        raise httpx.ConnectError("connexion refusée")
+
+    result, calls = _call([fail, _ok])
+    assert result == "pré-brief"
+    assert len(calls) == 2
+
+
+def test_5xx_retries_exhausted():
+    result, calls = _call([lambda: httpx.Response(503, text="indisponible")], max_retries=2)
+    assert isinstance(result, LLMGatewayError)
+    assert result.status == 503
+    assert len(calls) == 3  # appel initial + 2 nouvelles tentatives
+
+
+def test_non_retryable_status_fails_immediately():
+    result, calls = _call([lambda: httpx.Response(400, text="requête invalide")])
+    assert isinstance(result, LLMGatewayError)
+    assert result.status == 400
+    assert len(calls) == 1
+
+
+def test_unexpected_payload():
+    result, _ = _call([lambda: httpx.Response(200, json={"choices": []})])
+    assert isinstance(result, LLMGatewayError)
+
+
+def test_deadline_covers_retries():
+    async def slow():
+        await asyncio.sleep(1)
+        return _ok()
+
+    result, calls = _call([lambda: httpx.Response(503), slow], deadline=0.1)
+    assert isinstance(result, LLMGatewayError)
+    assert "délai" in str(result)
+    assert len(calls) == 2
+
+
+def test_backoff_uses_retry_after_or_bounded_jitter():
+    gateway = GroqGateway("test", backoff_base=0.5, backoff_max=2.0)
+    try:
+        assert gateway._backoff(0, "3") == 3.0
+        for attempt in range(6):
+            assert 0 <= gateway._backoff(attempt, "bientôt") <= min(2.0, 0.5 * 2 ** attempt)
+    finally:
+        asyncio.run(gateway.aclose())
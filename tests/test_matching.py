@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from synthetic_data import synthetic_clients, synthetic_shoppers
+from matching import (
+    Client, Shopper, ShopperIndex, area_distance, match, match_records, proximity_points, score_all,
+    top_matches, zone_id,
+)
+from shoppers_data import SHOPPERS
+
+CATALOGS = {"shoppers_data": SHOPPERS, "synthetic": synthetic_shoppers(150, seed=3)}
+
+
+@pytest.fixture(scope="module", params=sorted(CATALOGS))
+def catalog(request):
+    shoppers = CATALOGS[request.param]
+    return shoppers, ShopperIndex(shoppers)
+
+
+def test_scorers_agree(catalog):
+    """match (dicts), match_records (masques) et score_all (NumPy) : mêmes scores et raisons."""
+    shoppers, index = catalog
+    for client in synthetic_clients(300, seed=5):
+        record = Client.from_dict(client)
+        scores = score_all(client, index)
+        for i, shopper in enumerate(shoppers):
+            expected = match(client, shopper)
+            assert match_records(record, index.records[i]) == expected
+            assert scores[i] == expected[0]
+
+
+def test_top_matches_is_a_stable_full_sort(catalog):
+    shoppers, index = catalog
+    for client in synthetic_clients(300, seed=6):
+        ranked = sorted(
+            ((match(client, s), s) for s in shoppers),
+            key=lambda pair: (-pair[0][0], -pair[1]["note_moyenne"], pair[1]["id"]),
+        )
+        for k in (1, 3, 10):
+            expected = [(s, score, reasons) for (score, reasons), s in ranked if score > 0][:k]
+            assert top_matches(client, index, k) == expected
+
+
+def test_records_round_trip():
+    for shopper in SHOPPERS:
+        assert Shopper.from_dict(shopper).to_dict() == shopper
+    for client in synthetic_clients(20, seed=7):
+        assert Client.from_dict(client).to_dict() == client
+
+
+def test_proximity_is_graded_by_distance():
+    assert proximity_points(area_distance("Paris 15e", "Paris")) == 2
+    assert proximity_points(area_distance("Versailles", "Paris")) == 1  # ~18 km
+    assert proximity_points(area_distance("Marseille", "Paris")) == 0
+    assert area_distance("Ville inconnue", "Ville Inconnue") == 0.0
+    assert area_distance("Ville inconnue", "Paris") is None
+
+
+def test_presentiel_outside_radius_is_eliminated():
+    client = synthetic_clients(1)[0]
+    client.update(mode="presentiel", city="Marseille")
+    paris = next(s for s in SHOPPERS if s["zone"] == "Paris")
+    assert match(client, paris) == (0, [])
+    assert all(s["zone"] != "Paris" for s, _, _ in top_matches(client, ShopperIndex(SHOPPERS), 10))
+
+
+@pytest.mark.parametrize(
+    "city, zone",
+    [("Versailles 78000", "versailles"), ("Antibes centre", "antibes"), ("Neuilly", "paris"),
+     ("Nantes centre", "nantes"), ("Paris la Défense", "paris")],
+)
+def test_suffixed_cities_resolve(city, zone):
+    assert zone_id(city) == zone
+
+
+def test_match_does_not_depend_on_a_built_index():
+    """Worker sans ShopperIndex : match() doit déjà connaître les zones du catalogue."""
+    code = (
+        "from matching import match\n"
+        "from shoppers_data import SHOPPERS\n"
+        "nantes = next(s for s in SHOPPERS if s['zone'] == 'Nantes')\n"
+        "client = dict(mode='presentiel', city='Nantes centre', style=[], objective='',\n"
+        "              budget='', extra_info='')\n"
+        "print(match(client, nantes))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fresh = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+
+    nantes = next(s for s in SHOPPERS if s["zone"] == "Nantes")
+    client = dict(mode="presentiel", city="Nantes centre", style=[], objective="", budget="", extra_info="")
+    ShopperIndex(SHOPPERS)
+    assert fresh.stdout.strip() == repr(match(client, nantes))
+    assert match(client, nantes)[0] > 0
@@ -0,0 +1,71 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from synthetic_data import synthetic_clients, synthetic_shoppers
+from matching import ShopperIndex
+from shoppers_data import SHOPPERS
+from optimizer import capacity_vector, optimize_assignments, score_matrix
+
+
+def _check(clients, index, capacity) -> int:
+    """Vérifie capacités et scores renvoyés ; renvoie le total obtenu."""
+    result = optimize_assignments(clients, index, capacity)
+    assert [c for c, _, _ in result] == clients
+    scores = score_matrix(clients, index)
+    caps = capacity_vector(index, capacity)
+    loads = np.zeros(len(index), dtype=np.int64)
+    for i, (_, shopper, score) in enumerate(result):
+        if shopper is None:
+            assert score == 0
+            continue
+        j = index.position[shopper["id"]]
+        assert score == scores[i, j] > 0
+        loads[j] += 1
+    assert (loads <= caps).all()
+    return sum(score for _, _, score in result)
+
+
+def _brute_force(scores: np.ndarray, caps: np.ndarray) -> int:
+    """Meilleur total par énumération (-1 : client sans shopper)."""
+    best = 0
+    for choice in product(range(-1, scores.shape[1]), repeat=scores.shape[0]):
+        picked = [(i, j) for i, j in enumerate(choice) if j >= 0]
+        if any(scores[i, j] <= 0 for i, j in picked):
+            continue
+        if (np.bincount([j for _, j in picked], minlength=len(caps)) > caps).any():
+            continue
+        best = max(best, sum(int(scores[i, j]) for i, j in picked))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_matches_brute_force(seed):
+    index = ShopperIndex(synthetic_shoppers(4, seed))
+    clients = synthetic_clients(6, seed)
+    capacity = {sid: (seed + k) % 3 for k, sid in enumerate(index.ids)}
+    expected = _brute_force(score_matrix(clients, index), capacity_vector(index, capacity))
+    assert _check(clients, index, capacity) == expected
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_matches_linear_sum_assignment(seed):
+    optimize = pytest.importorskip("scipy.optimize")
+    catalog = SHOPPERS if seed % 2 else synthetic_shoppers(25, seed)
+    index = ShopperIndex(catalog)
+    clients = synthetic_clients(60, seed)
+    capacity = {sid: (seed + sid) % 4 for sid in index.ids} if seed % 3 == 0 else 1 + seed % 3
+
+    # Chaque place de shopper devient une colonne ; un score nul vaut « sans shopper »
+    caps = capacity_vector(index, capacity)
+    weights = score_matrix(clients, index)[:, np.repeat(np.arange(len(index)), caps)].astype(float)
+    weights[weights <= 0] = 0
+    rows, cols = optimize.linear_sum_assignment(-weights)
+    assert _check(clients, index, capacity) == weights[rows, cols].sum()
+
+
+def test_zero_capacity_leaves_clients_unassigned():
+    index = ShopperIndex(SHOPPERS)
+    clients = synthetic_clients(10)
+    assert all(shopper is None for _, shopper, _ in optimize_assignments(clients, index, 0))
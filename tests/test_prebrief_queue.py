@@ -0,0 +1,76 @@
+import sqlite3
+import time
+
+from prebrief_queue import FAILED, PENDING, RUNNING, PrebriefQueue
+
+
+def _queue(tmp_path, **options) -> PrebriefQueue:
+    return PrebriefQueue(str(tmp_path / "jobs.db"), **options)
+
+
+def _status(queue: PrebriefQueue, assignment_id: str) -> str:
+    row = queue._connect().execute(
+        "SELECT status FROM prebrief_jobs WHERE assignment_id = ?", (assignment_id,)
+    ).fetchone()
+    return row[0]
+
+
+def test_claim_complete_and_purge(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue_many([{"id": "a"}, {"id": "b"}])
+    queue.enqueue({"id": "a"})  # déjà en file : ignoré
+    assert queue.pending_count() == 2
+    assert queue.claim() == {"id": "a"}
+    queue.complete("a")
+    assert queue.counts() == {"done": 1, "pending": 1}
+    assert queue.purge(older_than=0) == 1
+    assert queue.claim() == {"id": "b"}
+    assert queue.claim() is None
+
+
+def test_failed_job_waits_for_its_backoff(tmp_path):
+    queue = _queue(tmp_path, retry_seconds=0.2)
+    queue.enqueue({"id": "a"})
+    assert queue.claim() == {"id": "a"}
+    assert queue.fail("a", "erreur") is True
+    assert _status(queue, "a") == PENDING
+    assert queue.claim() is None  # pas de reprise immédiate
+    time.sleep(0.25)
+    assert queue.claim() == {"id": "a"}
+
+
+def test_failed_job_is_dead_lettered_after_max_attempts(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2, retry_seconds=0)
+    queue.enqueue({"id": "a"})
+    queue.claim()
+    assert queue.fail("a", "erreur") is True
+    queue.claim()
+    assert queue.fail("a", "erreur") is False
+    assert _status(queue, "a") == FAILED
+    assert queue.claim() is None
+
+
+def test_expired_lease_counts_as_an_attempt(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2, lease_seconds=0.05)
+    queue.enqueue({"id": "a"})
+    assert queue.claim() == {"id": "a"}  # le worker plante sans rendre le job
+    assert _status(queue, "a") == RUNNING
+    time.sleep(0.1)
+    assert queue.claim() == {"id": "a"}  # bail expiré : repris une fois
+    time.sleep(0.1)
+    assert queue.claim() is None  # tentatives épuisées : plus jamais repris
+    assert _status(queue, "a") == FAILED
+
+
+def test_old_queue_file_gets_the_backoff_column(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE prebrief_jobs (seq INTEGER PRIMARY KEY AUTOINCREMENT, assignment_id TEXT UNIQUE NOT NULL, "
+        "assignment TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+        "last_error TEXT, created REAL NOT NULL, updated REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO prebrief_jobs (assignment_id, assignment, created, updated) VALUES ('a', '{\"id\": \"a\"}', 0, 0)")
+    conn.commit()
+    conn.close()
+    assert PrebriefQueue(path).claim() == {"id": "a"}
@@ -0,0 +1,39 @@
+import asyncio
+
+import httpx
+
+import llm
+import prebrief_worker
+from llm_gateway import GroqGateway
+from prebrief_queue import FAILED, PrebriefQueue
+from prebrief_template import TEMPLATE_STATUS
+from shoppers_data import SHOPPERS
+from storage import JsonlAssignmentStore, new_assignment
+from synthetic_data import synthetic_clients
+
+
+def test_gateway_error_fails_the_job_without_requeue(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "llm_cache", None)
+    store = JsonlAssignmentStore(str(tmp_path / "assignments.jsonl"))
+    queue = PrebriefQueue(str(tmp_path / "jobs.db"), retry_seconds=0)
+    assignment = new_assignment(synthetic_clients(1)[0], SHOPPERS[0])
+    store.append(assignment)
+    queue.enqueue(assignment)
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400, text="requête invalide")
+
+    async def run():
+        async with GroqGateway("test", transport=httpx.MockTransport(handler)) as gateway:
+            await prebrief_worker.run_async(store, queue, gateway, once=True)
+
+    asyncio.run(run())
+    assert len(calls) == 1  # ni nouvelle tentative de la passerelle, ni nouveau passage dans la file
+    assert queue.counts() == {FAILED: 1}
+    # Le shopper reçoit tout de même le pré-brief local
+    saved = store.get_for_shopper(SHOPPERS[0]["id"], assignment["id"])
+    assert saved["prebrief_status"] == TEMPLATE_STATUS
+    assert saved["prebrief"]
@@ -0,0 +1,61 @@
+import os
+from multiprocessing import get_context
+
+import numpy as np
+
+from semantic import DIM, SemanticIndex, embed, shopper_text
+from synthetic_data import synthetic_shoppers
+
+
+def _rows(path: str) -> int:
+    return os.path.getsize(path + ".f32") // (DIM * 4)
+
+
+def _expected(shoppers) -> np.ndarray:
+    return np.stack([embed(shopper_text(s)) for s in shoppers])
+
+
+def test_sync_only_embeds_new_or_changed_shoppers(tmp_path):
+    path = str(tmp_path / "vectors")
+    catalog = synthetic_shoppers(20, seed=1)
+    assert SemanticIndex(path).sync(catalog) == 20
+    assert SemanticIndex(path).sync(catalog) == 0  # relu depuis le disque : rien à refaire
+
+    catalog[3] = {**catalog[3], "tags": ["#nouveau_tag"]}
+    catalog.append({**catalog[0], "id": 99})
+    index = SemanticIndex(path)
+    assert index.sync(catalog) == 2
+    assert _rows(path) == 22
+
+    reloaded = SemanticIndex(path)
+    ids = [s["id"] for s in catalog]
+    assert np.allclose(reloaded.aligned(ids), _expected(catalog))
+    assert not reloaded.aligned([12345]).any()
+
+
+def test_sync_overwrites_interrupted_row(tmp_path):
+    path = str(tmp_path / "vectors")
+    catalog = synthetic_shoppers(5, seed=2)
+    SemanticIndex(path).sync(catalog[:3])
+    with open(path + ".f32", "ab") as f:
+        f.write(b"\0" * 100)  # écriture interrompue
+    assert SemanticIndex(path).sync(catalog) == 2
+    assert _rows(path) == 5
+    assert np.allclose(SemanticIndex(path).aligned([s["id"] for s in catalog]), _expected(catalog))
+
+
+def _sync_from_process(path: str):
+    SemanticIndex(path).sync(synthetic_shoppers(200, seed=3))
+
+
+def test_concurrent_syncs_write_each_shopper_once(tmp_path):
+    path = str(tmp_path / "vectors")
+    ctx = get_context("fork")
+    procs = [ctx.Process(target=_sync_from_process, args=(path,)) for _ in range(6)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    catalog = synthetic_shoppers(200, seed=3)
+    assert _rows(path) == 200
+    assert np.allclose(SemanticIndex(path).aligned([s["id"] for s in catalog]), _expected(catalog))
@@ -0,0 +1,190 @@
+import os
+import random
+import shutil
+from multiprocessing import get_context
+
+import pytest
+
+from storage import BACKENDS, JsonlAssignmentStore, open_assignment_store
+
+
+def _assignment(n: int, shopper_id: int, status: str = "pending") -> dict:
+    return {
+        "id": f"a{n}",
+        "timestamp": f"2026-01-01T00:00:{n:05d}",
+        "shopper_id": shopper_id,
+        "prebrief": "",
+        "prebrief_status": status,
+    }
+
+
+def _newest_first(assignments, shopper_id):
+    mine = [a for a in assignments if a["shopper_id"] == shopper_id]
+    return sorted(mine, key=lambda a: a["timestamp"], reverse=True)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JsonlAssignmentStore(str(tmp_path / "assignments.jsonl"))
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_update_and_paging(tmp_path, backend):
+    store = open_assignment_store(backend, str(tmp_path / f"assignments.{backend}"))
+    ref = [_assignment(n, n % 3) for n in range(30)]
+    store.append_many(ref[:20])
+    for a in ref[20:]:
+        store.append(a)
+    for a in ref[::4]:
+        a.update(prebrief="prêt", prebrief_status="ready")
+        store.update(a)
+
+    for sid in range(3):
+        expected = _newest_first(ref, sid)
+        assert store.count_for_shopper(sid) == len(expected)
+        assert store.recent_for_shopper(sid, 100) == expected
+        assert store.recent_for_shopper(sid, 3, 2) == expected[2:5]
+        assert store.load_for_shopper(sid) == expected[::-1]
+        assert store.get_for_shopper(sid, expected[0]["id"]) == expected[0]
+    assert store.get_for_shopper(1, ref[0]["id"]) is None  # a0 appartient au shopper 0
+    assert sorted(store.load_all(), key=lambda a: a["id"]) == sorted(ref, key=lambda a: a["id"])
+
+
+def test_rebuild_keeps_one_entry_per_assignment(store):
+    store.append(_assignment(1, 7))
+    for status in ("running", "ready", "template"):
+        store.update({**_assignment(1, 7), "prebrief_status": status})
+
+    shutil.rmtree(store.index_dir)
+    store.rebuild_index()
+    assert store.count_for_shopper(7) == 1
+    assert store.recent_for_shopper(7, 10)[0]["prebrief_status"] == "template"
+
+    # Rattrapage incrémental sur un index en retard : même résultat
+    store.update({**_assignment(1, 7), "prebrief_status": "ready"})
+    assert store.count_for_shopper(7) == 1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rotation_keeps_timestamp_order(store, seed):
+    """Ajouts, mises à jour et rotations au hasard, comparés à un tri par horodatage."""
+    rng = random.Random(seed)
+    ref = {}
+    for n in range(300):
+        pending = [a for a in ref.values() if a["prebrief_status"] == "pending"]
+        roll = rng.random()
+        if roll < 0.6 or not pending:
+            a = _assignment(n, rng.randrange(4))
+            ref[a["id"]] = a
+            store.append(a)
+        elif roll < 0.9:
+            a = {**rng.choice(pending), "prebrief_status": rng.choice(["ready", "template"])}
+            ref[a["id"]] = a
+            store.update(a)
+        elif roll < 0.97:
+            # Assignation peut-être déjà scellée (job terminé deux fois)
+            a = {**rng.choice(list(ref.values())), "prebrief": f"v{n}"}
+            ref[a["id"]] = a
+            store.update(a)
+        else:
+            store.rotate()
+    store.rotate()
+    assert os.listdir(store.segments_dir)
+    store.rebuild_index()  # reports et versions remplaçantes restent classés
+
+    for sid in range(4):
+        expected = _newest_first(ref.values(), sid)
+        assert store.count_for_shopper(sid) == len(expected)
+        for limit in (1, 7, 20):
+            for offset in range(0, len(expected) + 2, 9):
+                assert store.recent_for_shopper(sid, limit, offset) == expected[offset:offset + limit]
+        for a in expected[::5]:
+            assert store.get_for_shopper(sid, a["id"]) == a
+    assert store.load_all() == sorted(ref.values(), key=lambda a: a["timestamp"])
+
+
+def test_update_of_sealed_assignment_replaces_it(store):
+    store.append(_assignment(0, 1))
+    store.append({**_assignment(1, 1), "prebrief": "v1", "prebrief_status": "ready"})
+    store.append(_assignment(2, 1, "ready"))
+    store.rotate()
+    store.append(_assignment(3, 1))
+
+    # Un second worker termine le même job après la rotation
+    v2 = {**_assignment(1, 1), "prebrief": "v2", "prebrief_status": "ready"}
+    store.update(v2)
+    assert store.count_for_shopper(1) == 4
+    assert [a["id"] for a in store.recent_for_shopper(1, 10)] == ["a3", "a2", "a1", "a0"]
+    assert store.recent_for_shopper(1, 1, 2) == [v2]
+    assert store.get_for_shopper(1, "a1") == v2
+    assert [a["prebrief"] for a in store.load_all() if a["id"] == "a1"] == ["v2"]
+
+    # Toujours une seule copie après une nouvelle rotation puis une autre mise à jour
+    store.rotate()
+    v3 = {**v2, "prebrief": "v3"}
+    store.update(v3)
+    store.rebuild_index()
+    assert store.count_for_shopper(1) == 4
+    assert [a["id"] for a in store.recent_for_shopper(1, 10)] == ["a3", "a2", "a1", "a0"]
+    assert store.get_for_shopper(1, "a1") == v3
+    assert len(store.load_all()) == 4
+
+    store.expire("2027-01-01")
+    assert store._superseded() == {}
+
+
+def test_rotate_carries_pending_and_expire_archives(store, tmp_path):
+    store.append_many([_assignment(n, 1, "ready") for n in range(5)])
+    store.append(_assignment(5, 1))
+    segment = store.rotate()
+    assert segment and os.path.exists(segment)
+    assert store.rotate() is None  # seulement des pré-briefs en attente : rien à sceller
+
+    # L'assignation en attente reste dans le journal actif, où le worker la met à jour
+    assert [a["id"] for a in JsonlAssignmentStore(store.path).load_all()][-1] == "a5"
+    store.update({**_assignment(5, 1), "prebrief_status": "ready"})
+    assert store.count_for_shopper(1) == 6
+
+    archive = tmp_path / "archives"
+    assert store.expire("2026-01-01T00:00:00003", str(archive)) == 0  # segment encore dans la fenêtre
+    assert store.expire("2027-01-01", str(archive)) == 5
+    assert len(os.listdir(archive)) == 2
+    assert [a["id"] for a in store.recent_for_shopper(1, 10)] == ["a5"]
+
+
+def test_tail_follows_appends_updates_and_rotation(store):
+    store.append(_assignment(0, 1, "ready"))
+    tail = store.tail()
+    assert tail.poll() == []
+
+    store.append(_assignment(1, 1))
+    with open(store.path, "ab") as f:
+        f.write(b'{"id": "partiel"')  # ligne en cours d'écriture
+    assert [a["id"] for a in tail.poll()] == ["a1"]
+    with open(store.path, "ab") as f:
+        f.write(b', "shopper_id": 2}\n')
+    assert [a["id"] for a in tail.poll()] == ["partiel"]
+
+    store.update({**_assignment(1, 1), "prebrief_status": "ready"})
+    assert tail.poll()[-1]["prebrief_status"] == "ready"
+
+    store.append(_assignment(2, 1))
+    store.rotate()  # nouveau journal actif : le suivi reprend à son début
+    assert [a["id"] for a in tail.poll()] == ["a2"]
+
+
+def _append_from_process(path: str, start: int):
+    store = JsonlAssignmentStore(path)
+    for n in range(start, start + 50):
+        store.append(_assignment(n, n % 2))
+
+
+def test_concurrent_writers(store):
+    ctx = get_context("fork")
+    procs = [ctx.Process(target=_append_from_process, args=(store.path, 1000 * k)) for k in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert store.count_for_shopper(0) + store.count_for_shopper(1) == 200
+    assert len({a["id"] for a in store.load_all()}) == 200